@@ -8,6 +8,7 @@ from sqlalchemy.pool import NullPool
 from app.db.base import Base
 from app.models.service import Service, ServicePrice
 from app.models.accommodation import Accommodation, AccommodationPrice
+from app.models.booking import Booking, AccommodationOccupancy
 from app.utils.enums import Weekday, AccommodationType
 
 
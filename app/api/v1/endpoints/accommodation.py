@@ -1,29 +1,229 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from app.db.session import get_async_db
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from typing import List, Optional
+from app.core.config import FLEXIBLE_SEARCH_MAX_CANDIDATES, OCCUPANCY_HORIZON_DAYS
+from app.core.security import sign_quote
+from app.core.serialization import ORJSONResponse, compile_serializer
+from app.db.session import get_async_db, get_async_read_db
 from app.models.accommodation import Accommodation, AccommodationPrice
-from app.schemas.accommodation import AccommodationSchema, AccommodationCreateSchema
-from app.schemas.booking import AvailableAccommodationSchema
+from app.schemas.accommodation import AccommodationCalendarSchema, AccommodationSchema, AccommodationCreateSchema
+from app.schemas.booking import AvailableAccommodationSchema, FlexibleAvailabilitySchema
 from app.utils.enums import AccommodationType, Weekday
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from app.services.booking_service import check_accommodation_availability, calculate_accommodation_price
+from app.services.booking_service import (get_free_units, calculate_accommodation_price,
+                                          find_flexible, flexible_candidates)
+from app.services.availability_calendar import get_calendars, parse_month
+from app.services.catalog_cache import CatalogSnapshot, catalog_cache
 from sqlalchemy import and_, or_
-from datetime import date, datetime
-from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
 
 
 router = APIRouter(prefix="/accommodations", tags=["Accommodations"])
+logger = logging.getLogger(__name__)
+
+serialize_accommodation = compile_serializer(AccommodationSchema)
+serialize_available = compile_serializer(AvailableAccommodationSchema)
+serialize_flexible = compile_serializer(FlexibleAvailabilitySchema)
 
 @router.get("/", response_model=list[AccommodationSchema])
-async def get_accommodations(db: AsyncSession = Depends(get_async_db)):
-    result = await db.execute(select(Accommodation).options(selectinload(Accommodation.prices)))
+async def get_accommodations(request: Request, db: AsyncSession = Depends(get_async_db)):
+    snapshot = catalog_cache.get("accommodations")
+    if snapshot is None:
+        result = await db.execute(select(Accommodation).options(selectinload(Accommodation.prices)))
+        snapshot = catalog_cache.set("accommodations", None, CatalogSnapshot([
+            serialize_accommodation(accommodation) for accommodation in result.scalars().all()
+        ]))
+    return snapshot.response(request)
+
+@router.get("/find", response_model=list[AvailableAccommodationSchema])
+async def get_available_accommodations(
+        check_in_date: date = Query(..., description="Дата заезда"),
+        check_out_date: date = Query(..., description="Дата выезда"),
+        guests: int = Query(..., ge=1, description="Количество гостей"),
+        db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Поиск доступных вариантов размещения.
+
+    Параметры:
+    - check_in_date: дата заезда
+    - check_out_date: дата выезда
+    - guests: количество гостей
+    Возвращает список доступных вариантов с рассчитанными ценами.
+    """
+
+    # Валидация входных данных
+    if check_in_date > check_out_date:
+        raise HTTPException(
+            status_code=400,
+            detail="Дата выезда должна быть не раньше даты заезда"
+        )
+    if check_in_date < datetime.now().date():
+        raise HTTPException(
+            status_code=400,
+            detail="Дата заезда не может быть в прошлом"
+        )
+
+    suitable_accommodations = await _suitable_accommodations(db, guests)
+    available_accommodations = []
+
+    # Свободные единицы для всех вариантов сразу - одним запросом
+    free_units = await get_free_units(
+        db, suitable_accommodations, check_in_date, check_out_date
+    )
+
+    for acc in suitable_accommodations:
+        if free_units[acc.id] <= 0:
+            continue  # Пропускаем занятые
+
+        # Рассчитываем цену (вынесли в отдельную функцию)
+        price_info = calculate_accommodation_price(
+            acc, check_in_date, check_out_date, guests
+        )
+
+        available_accommodations.append({
+            "accommodation": acc,
+            "total_price": price_info["total"],
+            "nights": price_info["nights"],
+            "requires_extra_bed": guests > acc.capacity,
+            "prices": price_info["details"],
+            "quote_token": sign_quote(acc.id, check_in_date, check_out_date, guests, price_info["total"]),
+        })
+
+    return ORJSONResponse([serialize_available(item) for item in available_accommodations])
+
+@router.get("/find/flexible", response_model=list[FlexibleAvailabilitySchema])
+async def find_flexible_accommodations(
+        guests: int = Query(..., ge=1, description="Количество гостей"),
+        window_start: Optional[date] = Query(None, description="Начало окна поиска"),
+        window_end: Optional[date] = Query(None, description="Конец окна поиска (последний день выезда)"),
+        nights: Optional[int] = Query(None, ge=0, le=60, description="Сколько ночей (0 - беседка на день)"),
+        check_in_weekdays: Optional[List[int]] = Query(None, description="Дни недели заезда, 0 - понедельник"),
+        ranges: Optional[List[str]] = Query(None, description="Варианты дат вида 2025-06-06/2025-06-08"),
+        db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Гибкий поиск: "любые выходные в июне на 4 человек" одним запросом.
+
+    Варианты дат задаются окном (window_start, window_end, nights и, при желании, check_in_weekdays)
+    или списком ranges. Для каждого размещения возвращаются только свободные варианты с ценой
+    и quote_token для POST /bookings/.
+    """
+    if ranges:
+        try:
+            candidates = [tuple(date.fromisoformat(part) for part in value.split("/")) for value in ranges]
+        except ValueError:
+            candidates = []
+        if not candidates or any(len(candidate) != 2 for candidate in candidates):
+            raise HTTPException(status_code=400, detail="Варианты дат задаются как ГГГГ-ММ-ДД/ГГГГ-ММ-ДД")
+    elif window_start and window_end and nights is not None:
+        # Окно проверяем до перебора дней: иначе огромное окно перебирается целиком
+        # (а у date.max еще и переполняется)
+        _check_search_window(window_start, window_end)
+        if check_in_weekdays and not set(check_in_weekdays) <= set(range(7)):
+            raise HTTPException(status_code=400, detail="Дни недели задаются числами от 0 до 6")
+        candidates = flexible_candidates(window_start, window_end, nights, check_in_weekdays)
+    else:
+        raise HTTPException(status_code=400, detail="Укажите ranges или window_start, window_end и nights")
+
+    if any(check_in > check_out for check_in, check_out in candidates):
+        raise HTTPException(status_code=400, detail="Дата выезда должна быть не раньше даты заезда")
+    if candidates:
+        _check_search_window(min(check_in for check_in, _ in candidates), max(check_out for _, check_out in candidates))
+    if len(candidates) > FLEXIBLE_SEARCH_MAX_CANDIDATES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Слишком много вариантов дат, максимум {FLEXIBLE_SEARCH_MAX_CANDIDATES}"
+        )
+
+    results = await find_flexible(db, await _suitable_accommodations(db, guests), candidates, guests)
+
+    for result in results:
+        for option in result["options"]:
+            option["quote_token"] = sign_quote(
+                result["accommodation"].id, option["check_in_date"], option["check_out_date"],
+                guests, option["total_price"]
+            )
+
+    return ORJSONResponse([serialize_flexible(result) for result in results])
+
+@router.get("/calendar", response_model=list[AccommodationCalendarSchema])
+async def get_accommodations_calendar(
+        month: str = Query(..., regex=r"^\d{4}-\d{2}$", description="Месяц в формате YYYY-MM"),
+        ids: Optional[List[int]] = Query(None, description="Размещения (по умолчанию все)"),
+        db: AsyncSession = Depends(get_async_db),
+):
+    """Календарь свободных единиц и цен на месяц сразу для нескольких размещений"""
+    query = select(Accommodation).order_by(Accommodation.id)
+    if ids:
+        query = query.where(Accommodation.id.in_(ids))
+    result = await db.execute(query)
+
+    return ORJSONResponse(await get_calendars(db, result.scalars().all(), _month(month)))
+
+@router.get("/{accommodation_id}/calendar", response_model=AccommodationCalendarSchema)
+async def get_accommodation_calendar(
+        accommodation_id: int,
+        month: str = Query(..., regex=r"^\d{4}-\d{2}$", description="Месяц в формате YYYY-MM"),
+        db: AsyncSession = Depends(get_async_db),
+):
+    """Календарь на месяц: сколько единиц свободно и сколько стоит ночь в каждый день"""
+    accommodation = await db.get(Accommodation, accommodation_id)
+    if accommodation is None:
+        raise HTTPException(status_code=404, detail="Accommodation not found")
+
+    calendars = await get_calendars(db, [accommodation], _month(month))
+    return ORJSONResponse(calendars[0])
+
+def _check_search_window(first_day: date, last_day: date) -> None:
+    """Даты поиска - от сегодня до горизонта бронирования (OCCUPANCY_HORIZON_DAYS)"""
+    today = datetime.now().date()
+    if first_day < today:
+        raise HTTPException(status_code=400, detail="Дата заезда не может быть в прошлом")
+    if last_day > today + timedelta(days=OCCUPANCY_HORIZON_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Поиск возможен не дальше чем на {OCCUPANCY_HORIZON_DAYS} дней вперед"
+        )
+
+def _month(month: str) -> str:
+    """
+    Месяц календаря - от текущего до месяца конца горизонта бронирования (OCCUPANCY_HORIZON_DAYS):
+    календари кэшируются по месяцам, произвольные месяцы раздували бы кэш
+    """
+    try:
+        start, _ = parse_month(month)
+    except (ValueError, OverflowError):  # 9999-12: следующего месяца уже нет в date
+        raise HTTPException(status_code=400, detail="Месяц задается в формате YYYY-MM")
+    today = datetime.now().date()
+    if not today.replace(day=1) <= start <= today + timedelta(days=OCCUPANCY_HORIZON_DAYS):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Календарь доступен с текущего месяца и не дальше чем на {OCCUPANCY_HORIZON_DAYS} дней вперед"
+        )
+    return month
+
+async def _suitable_accommodations(db: AsyncSession, guests: int) -> List[Accommodation]:
+    """Все подходящие по вместимости варианты"""
+    query = select(Accommodation).where(or_(
+        Accommodation.capacity >= guests,   # Основная вместимость достаточна
+        and_(Accommodation.capacity + Accommodation.extra_beds_available >= guests, Accommodation.extra_beds_available > 0) # Или есть доп. места
+        )
+    )
+
+    result = await db.execute(query)
     return result.scalars().all()
 
 @router.get("/{accommodation_id}", response_model=AccommodationSchema)
 async def get_accommodation_by_id(
     accommodation_id: int,
     db: AsyncSession = Depends(get_async_db) ):
+    payload = catalog_cache.get("accommodations", accommodation_id)
+    if payload is not None:
+        return ORJSONResponse(payload)
+
     result = await db.execute(
         select(Accommodation)
         .options(selectinload(Accommodation.prices))
@@ -34,7 +234,8 @@ async def get_accommodation_by_id(
     if accommodation is None:
         raise HTTPException(status_code=404, detail="Accommodation not found")
 
-    return accommodation
+    payload = serialize_accommodation(accommodation)
+    return ORJSONResponse(catalog_cache.set("accommodations", accommodation_id, payload))
 
 @router.post("/", response_model=AccommodationSchema)
 async def create_accommodation(
@@ -65,7 +266,10 @@ async def create_accommodation(
     try:
         db.add(new_accommodation)
         await db.flush()
-        print("Записали в базу банных - ", new_accommodation)
+        logger.info(
+            "Записали размещение в базу: %s", new_accommodation.name,
+            extra={"accommodation_id": new_accommodation.id}
+        )
 
         if accommodation_data.prices:
             for price in accommodation_data.prices:
@@ -75,79 +279,18 @@ async def create_accommodation(
                     price=price.price,
                     extra_bed_price=price.extra_bed_price
                 ))
-                print( "Записываем цену: ", new_accommodation.id, Weekday(price.weekday_type), price.price, price.extra_bed_price)
+                logger.debug(
+                    "Записываем цену размещения %s: %s %s (доп. место %s)",
+                    new_accommodation.id, price.weekday_type, price.price, price.extra_bed_price
+                )
 
 
         await db.commit()
         await db.refresh(new_accommodation)
+        catalog_cache.invalidate("accommodations")
 
         return new_accommodation
 
     except Exception:
         await db.rollback()
         raise
-
-
-@router.get("/find", response_model=list[AvailableAccommodationSchema])
-async def get_available_accommodations(
-        check_in_date: date = Query(..., description="Дата заезда"),
-        check_out_date: date = Query(..., description="Дата выезда"),
-        guests: int = Query(..., ge=1, description="Количество гостей"),
-        db: Session = Depends(get_async_db),
-):
-    """
-    Поиск доступных вариантов размещения.
-
-    Параметры:
-    - check_in_date: дата заезда
-    - check_out_date: дата выезда
-    - guests: количество гостей
-    Возвращает список доступных вариантов с рассчитанными ценами.
-    """
-
-    # Валидация входных данных
-    if check_in_date > check_out_date:
-        raise HTTPException(
-            status_code=400,
-            detail="Дата выезда должна быть не раньше даты заезда"
-        )
-    if check_in_date < datetime.now().date():
-        raise HTTPException(
-            status_code=400,
-            detail="Дата заезда не может быть в прошлом"
-        )
-
-    # Получаем все подходящие по вместимости варианты
-    query = (db.query(Accommodation).
-             filter(or_(
-        Accommodation.capacity >= guests,   # Основная вместимость достаточна
-        and_(Accommodation.capacity + Accommodation.extra_beds_available >= guests, Accommodation.extra_beds_available > 0) # Или есть доп. места
-        )
-    ))
-
-    suitable_accommodations = query.all()
-    available_accommodations = []
-
-    # Проверяем каждый вариант на доступность
-    for acc in suitable_accommodations:
-        is_available = check_accommodation_availability(
-            db, acc.id, check_in_date, check_out_date
-        )
-
-        if not is_available:
-            continue  # Пропускаем занятые
-
-        # Рассчитываем цену (вынесли в отдельную функцию)
-        price_info = calculate_accommodation_price(
-            acc, check_in_date, check_out_date, guests
-        )
-
-        available_accommodations.append({
-            "accommodation": acc,
-            "total_price": price_info["total"],
-            "nights": price_info["nights"],
-            "requires_extra_bed": guests > acc.capacity,
-            "prices": price_info["details"]
-        })
-
-    return available_accommodations
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, Request, Form
-from sqlalchemy.orm import Session
+import logging
+from fastapi import APIRouter, Depends, Request
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import FormData
 from starlette.templating import Jinja2Templates
-from app.db.session import get_db
+from typing import Dict, List
+from app.db.session import get_async_db
 from app.models.accommodation import Accommodation, AccommodationPrice
-from app.utils.enums import AccommodationType, Weekday
-from datetime import datetime
+from app.schemas.accommodation import AccommodationCreateSchema
+from app.services.catalog_cache import catalog_cache
 from fastapi.responses import RedirectResponse
 
 
@@ -12,93 +16,125 @@ templates = Jinja2Templates(directory="templates")
 
 
 router = APIRouter(prefix="/accommodations", tags=["Accommodations"])
+logger = logging.getLogger(__name__)
+
+# Поля одного размещения в форме. Каждое поле повторяется по разу на размещение,
+# значения с одинаковым номером относятся к одному размещению
+FORM_FIELDS = (
+    "name", "type", "short_description", "full_description", "image", "capacity", "count",
+    "check_in_time", "check_out_time", "extra_beds_available",
+)
+FORM_DEFAULTS = {"count": 1, "check_in_time": "15:00", "check_out_time": "12:00", "extra_beds_available": 0}
+
+# Поля строки цены: строк у размещения сколько угодно, price_entry - номер блока размещения (с нуля)
+PRICE_FIELDS = ("price_entry", "price_weekday_type", "price", "price_extra_bed_price")
+PRICE_DEFAULTS = {"price_extra_bed_price": 0}
+
+
+class FormError(ValueError):
+    """Ошибка в данных формы, показывается на странице"""
+
+
+def _parse_price_rows(form: FormData, total: int) -> Dict[int, List[dict]]:
+    """Строки цен формы по номеру блока размещения; строки без цены пропускаются"""
+    columns = {field: form.getlist(field) for field in PRICE_FIELDS}
+    rows = len(columns["price_entry"])
+    if any(len(values) != rows for values in columns.values()):
+        raise FormError("Поля цен не совпадают по количеству строк")
+
+    prices: Dict[int, List[dict]] = {}
+    for index in range(rows):
+        row = {field: values[index].strip() for field, values in columns.items()}
+        if not row["price"]:
+            continue
+        entry = row.pop("price_entry")
+        if not entry.isdigit() or int(entry) >= total:
+            raise FormError("Строка цены не относится ни к одному размещению")
+        prices.setdefault(int(entry), []).append({
+            "weekday_type": row["price_weekday_type"],
+            "price": row["price"],
+            "extra_bed_price": row["price_extra_bed_price"] or PRICE_DEFAULTS["price_extra_bed_price"],
+        })
+    return prices
+
+
+def parse_accommodation_form(form: FormData) -> List[AccommodationCreateSchema]:
+    """
+    Разбирает форму добавления размещений: поля размещения повторяются по разу на блок,
+    строки цен - сколько угодно раз, каждая с номером своего блока (price_entry).
+    Блоки с пустым названием пропускаются. Пустые необязательные поля берутся по умолчанию.
+    """
+    columns = {field: form.getlist(field) for field in FORM_FIELDS}
+    total = len(columns["name"])
+    if any(len(values) > total for values in columns.values()):
+        raise FormError("Поля формы не совпадают по количеству размещений")
+    prices = _parse_price_rows(form, total)
+
+    accommodations = []
+    for index in range(total):
+        row = {}
+        for field, values in columns.items():
+            value = values[index].strip() if index < len(values) else ""
+            if value:
+                row[field] = value
+            elif field in FORM_DEFAULTS:
+                row[field] = FORM_DEFAULTS[field]
+        if "name" not in row:
+            continue
+
+        row["prices"] = prices.get(index, [])
+        if not row["prices"]:
+            raise FormError(f"Размещение «{row['name']}»: не указана ни одна цена")
+        weekday_types = [price["weekday_type"] for price in row["prices"]]
+        if len(set(weekday_types)) != len(weekday_types):
+            raise FormError(f"Размещение «{row['name']}»: цена на один тип дня указана несколько раз")
+        try:
+            accommodations.append(AccommodationCreateSchema.parse_obj(row))
+        except ValidationError as e:
+            fields = ", ".join(".".join(map(str, error["loc"])) for error in e.errors())
+            raise FormError(f"Размещение «{row['name']}»: неверно заполнены поля {fields}")
+
+    if not accommodations:
+        raise FormError("Не заполнено ни одно размещение")
+    return accommodations
 
 
 @router.get("/add")
-def add_accommodation_page(request: Request):
+async def add_accommodation_page(request: Request):
     return templates.TemplateResponse("add_accommodation.html", {"request": request})
 
 
 @router.post("/add")
-def create_accommodation(
-        request: Request,
-        name: str = Form(...),
-        type: AccommodationType = Form(...),
-        short_description: str = Form(None),
-        full_description: str = Form(None),
-        image: str = Form(None),
-        capacity: int = Form(...),
-        count: int = Form(1),
-        check_in_time: str = Form("15:00"),
-        check_out_time: str = Form("12:00"),
-        extra_beds_available: int = Form(0),
-        weekday_price: float = Form(...),
-        weekday_extra_bed_price: float = Form(0.00),
-        weekend_price: float = Form(...),
-        weekend_extra_bed_price: float = Form(0.00),
-        db: Session = Depends(get_db)
-):
-    print(f"Полученные данные: name={name}, type={type}, capacity={capacity}, count={count}")
-    print(f"check_in_time={check_in_time}, check_out_time={check_out_time}")
-    print(f"weekday_price={weekday_price}, weekend_price={weekend_price}")
-
-    # Преобразуем тип размещения из строки в Enum
+async def create_accommodations(request: Request, db: AsyncSession = Depends(get_async_db)):
+    """
+    Добавление размещений из HTML-формы (одного или нескольких сразу) с любым числом
+    строк цен у каждого. Все размещения записываются в одной транзакции.
+    """
     try:
-        type = AccommodationType(type)
-        print(f"Тип размещения после конвертации: {type}")
-    except ValueError:
-        print(f"Ошибка конвертации type: {type}")
-        return {"error": "Неверный тип размещения"}
+        accommodations = parse_accommodation_form(await request.form())
+    except FormError as e:
+        logger.warning("Ошибка в форме добавления размещений: %s", e)
+        return templates.TemplateResponse(
+            "add_accommodation.html", {"request": request, "error": str(e)}, status_code=400
+        )
+
+    new_accommodations = [
+        Accommodation(
+            **accommodation.dict(exclude={"prices"}),
+            prices=[AccommodationPrice(**price.dict()) for price in accommodation.prices]
+        )
+        for accommodation in accommodations
+    ]
 
-    # Преобразуем время из строки в объект time
     try:
-        check_in_time = datetime.strptime(check_in_time, "%H:%M").time()
-        check_out_time = datetime.strptime(check_out_time, "%H:%M").time()
-        print(f"Преобразованное время: check_in_time={check_in_time}, check_out_time={check_out_time}")
-    except ValueError as e:
-        print(f"Ошибка конвертации времени: {e}")
-        return {"error": "Неверный формат времени"}
-
-    # Создаем объект размещения
-    new_accommodation = Accommodation(
-        name=name,
-        type=type,
-        short_description=short_description,
-        full_description=full_description,
-        image=image,
-        capacity=capacity,
-        count=count,
-        check_in_time=check_in_time,
-        check_out_time=check_out_time,
-        extra_beds_available=extra_beds_available
-    )
-
-    print(f"Создан объект размещения: {new_accommodation}")
-
-    db.add(new_accommodation)
-    db.commit()
-    db.refresh(new_accommodation)
-
-    # Создаем цены (Будний и Выходной)
-    weekday_price_entry = AccommodationPrice(
-        accommodation_id=new_accommodation.id,
-        weekday_type=Weekday.weekday,
-        price=weekday_price,
-        extra_bed_price=weekday_extra_bed_price
-    )
-
-    weekend_price_entry = AccommodationPrice(
-        accommodation_id=new_accommodation.id,
-        weekday_type=Weekday.weekend,
-        price=weekend_price,
-        extra_bed_price=weekend_extra_bed_price
-    )
-
-    print(f"Созданы цены: {weekday_price_entry}, {weekend_price_entry}")
-
-    db.add_all([weekday_price_entry, weekend_price_entry])
-    db.commit()
-
-    print("Добавление размещения завершено.")
-
-    return RedirectResponse(url="/accommodations/add", status_code=303)
\ No newline at end of file
+        db.add_all(new_accommodations)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    catalog_cache.invalidate("accommodations")
+
+    for accommodation in new_accommodations:
+        logger.info("Добавлено размещение: %s", accommodation.name, extra={"accommodation_id": accommodation.id})
+
+    return RedirectResponse(url="/accommodations/add", status_code=303)
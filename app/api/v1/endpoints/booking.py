@@ -1,50 +1,120 @@
+import asyncio
+import hashlib
+import random
 from typing import Optional
+from decimal import Decimal
+from app.core.config import BOOKING_WRITE_RETRIES
+from app.core.security import QuoteTokenError, verify_quote
+from app.core.serialization import ORJSONResponse, compile_serializer
 from app.models.booking import Booking
 from app.schemas.booking import AvailableAccommodationSchema, BookingCreateSchema, BookingResponseSchema
-from fastapi import APIRouter, Depends, Request, Form, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, Request, Response, Form, HTTPException, status, Query
 from starlette.templating import Jinja2Templates
-from app.db.session import get_async_db, get_db
+from app.db.session import get_async_db, get_async_read_db
 from app.models.accommodation import Accommodation, AccommodationPrice
 from app.schemas.accommodation import AccommodationSchema, AccommodationCreateSchema
 from app.utils.enums import AccommodationType, Weekday
-from fastapi.responses import RedirectResponse
+from app.utils.helpers import decode_cursor, encode_cursor
+from app.services.booking_export import EXPORT_FORMATS, export_bookings
+from app.services.booking_import import import_bookings, parse_bulk_body
+from app.services.idempotency import IdempotencyKeyReused, idempotency_store
+from app.services.price_calendar import CENT
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import OperationalError
 from datetime import date, datetime, time
-from app.services.booking_service import check_accommodation_availability, calculate_accommodation_price
+from app.services.booking_service import (check_accommodation_availability, calculate_accommodation_price,
+                                          reserve_occupancy, on_booking_committed, bookings_on_date)
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
+serialize_booking = compile_serializer(BookingResponseSchema)
+
 @router.get("/", response_model=list[BookingResponseSchema])
 async def get_bookings(
     target_date: Optional[date] = Query(None, description="Фильтрация по дате заезда"),
     limit: int = Query(10, ge=1, le=100, description="Сколько записей вернуть"),
-    offset: int = Query(0, ge=0, description="Сколько записей пропустить"),
-    db: AsyncSession = Depends(get_async_db)
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    offset: int = Query(0, ge=0, description="Сколько записей пропустить (если курсор не передан)"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
+    """
+    Брони от новых к старым, постранично по ключу (created_at, id).
+    Если есть следующая страница, ее курсор возвращается в заголовке X-Next-Cursor.
+    """
     query = select(Booking).options(selectinload(Booking.accommodation))
 
     if target_date:
+        query = query.where(bookings_on_date(target_date))
+
+    if cursor is not None:
+        cursor_id = decode_cursor(cursor)
+        if cursor_id is None:
+            raise HTTPException(status_code=400, detail="Некорректный курсор")
+        # Без записи курсора подзапрос ниже вернул бы NULL и пустую страницу вместо ошибки
+        if await db.scalar(select(Booking.id).where(Booking.id == cursor_id)) is None:
+            raise HTTPException(status_code=400, detail="Запись курсора удалена, начните с первой страницы")
+
+        # Сравниваем со значением created_at из самой таблицы, чтобы формат хранения совпадал
+        cursor_created_at = select(Booking.created_at).where(Booking.id == cursor_id).scalar_subquery()
         query = query.where(
-            or_(
-                and_(
-                    Booking.check_in_date <= target_date,
-                    Booking.check_out_date > target_date
-                ),
-                and_(
-                    Booking.check_in_date == target_date,
-                    Booking.check_out_date == target_date
-                )
-            )
+            Booking.created_at <= cursor_created_at,
+            or_(Booking.created_at < cursor_created_at, Booking.id < cursor_id)
         )
+    elif offset:
+        query = query.offset(offset)
 
-    query = query.order_by(Booking.created_at.desc()).offset(offset).limit(limit)
+    # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+    query = query.order_by(Booking.created_at.desc(), Booking.id.desc()).limit(limit + 1)
     result = await db.execute(query)
     bookings = result.scalars().all()
-    return bookings
+
+    headers = {}
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(bookings[-1].id)
+
+    return ORJSONResponse([serialize_booking(booking) for booking in bookings], headers=headers)
+
+@router.post("/bulk")
+async def import_bookings_bulk(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Массовая загрузка броней: NDJSON (Content-Type: application/x-ndjson) или JSON-массив
+    объектов в формате POST /bookings/. Возвращает результат по каждой строке.
+    """
+    try:
+        rows = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return await import_bookings(db, rows)
+
+@router.get("/export")
+async def export_bookings_stream(
+    date_from: Optional[date] = Query(None, alias="from", description="Дата заезда с (включительно)"),
+    date_to: Optional[date] = Query(None, alias="to", description="Дата заезда по (включительно)"),
+    export_format: str = Query("csv", alias="format", regex="^(csv|ndjson)$", description="csv или ndjson"),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Выгрузка всех броней за период для бухгалтерии одним потоком (CSV или NDJSON).
+    Строки читаются из БД и отдаются пачками, без постраничных запросов.
+    """
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="Дата 'from' должна быть не позже даты 'to'")
+
+    filename = f"bookings_{date_from or 'start'}_{date_to or 'end'}.{export_format}"
+    return StreamingResponse(
+        export_bookings(db, export_format, date_from, date_to),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 @router.get("/{booking_id}", response_model=BookingResponseSchema)
 async def get_booking_by_id(
@@ -61,18 +131,47 @@ async def get_booking_by_id(
     if booking is None:
         raise HTTPException(status_code=404, detail="Бронирование не найдено")
 
-    return booking
+    return ORJSONResponse(serialize_booking(booking))
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def create_booking(
     booking_data: BookingCreateSchema,
-    db: Session = Depends(get_async_db)
+    idempotency_key: Optional[str] = Header(None, max_length=255, description="Ключ для безопасных повторов запроса"),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Создание брони. С заголовком Idempotency-Key повтор запроса возвращает
+    сохраненный ответ первого запроса, не создавая новую бронь.
+    """
+    if idempotency_key is None:
+        return await _create_booking(booking_data, db)
+
+    async def handler():
+        try:
+            return status.HTTP_201_CREATED, await _create_booking(booking_data, db)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                raise  # Временные ошибки не запоминаем, запрос можно повторить
+            return e.status_code, {"detail": e.detail}
+
+    fingerprint = hashlib.sha256(booking_data.json(sort_keys=True).encode()).hexdigest()
+    try:
+        status_code, content, replayed = await idempotency_store.execute(idempotency_key, fingerprint, handler)
+    except IdempotencyKeyReused:
+        raise HTTPException(status_code=422, detail="Idempotency-Key уже использован для другого запроса")
+
+    headers = {"Idempotent-Replayed": "true"} if replayed else None
+    return JSONResponse(content, status_code=status_code, headers=headers)
+
+
+async def _create_booking(booking_data: BookingCreateSchema, db: AsyncSession) -> dict:
     """
     При отправке POST запроса с нужными полями происходит поиск нужного
-    размещения, подсчет цены, и создается бронь.
+    размещения и создается бронь.
     Фронт нам должен отправить все данные исходя из предыдущего /find запроса
-    Мы проверяем цену, если совпадает, то все ок
+    вместе с quote_token - подписанным расчетом цены, тогда цена не пересчитывается.
+    Без токена цена считается заново. В обоих случаях переданная цена (ее видел гость)
+    должна совпасть с итоговой.
     """
 
     # Валидация входных данных
@@ -86,12 +185,26 @@ async def create_booking(
             status_code=400,
             detail="Дата заезда не может быть в прошлом"
         )
-    accommodation = db.query(Accommodation).get(booking_data.accommodation_id)
+
+    quote = None
+    if booking_data.quote_token:
+        try:
+            quote = verify_quote(booking_data.quote_token)
+        except QuoteTokenError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if (quote.accommodation_id, quote.check_in_date, quote.check_out_date, quote.guests) != (
+            booking_data.accommodation_id, booking_data.check_in_date,
+            booking_data.check_out_date, booking_data.guests
+        ):
+            raise HTTPException(status_code=400, detail="Расчет цены не соответствует бронированию")
+
+    accommodation = await db.get(Accommodation, booking_data.accommodation_id)
 
     if not accommodation:
         raise HTTPException(status_code=404, detail="Произошла ошибка")
 
-    is_available = check_accommodation_availability(
+    is_available = await check_accommodation_availability(
         db,
         booking_data.accommodation_id,
         booking_data.check_in_date,
@@ -101,27 +214,45 @@ async def create_booking(
     if not is_available:
         raise HTTPException(status_code=400, detail="Уже забронировано")
 
-    price_info = calculate_accommodation_price(
-        booking_data.accommodation_id,
-        booking_data.check_in_date,
-        booking_data.check_out_date,
-        booking_data.guests
-    )
+    if quote is not None:
+        total_price = quote.total
+    else:
+        total_price = calculate_accommodation_price(
+            accommodation,
+            booking_data.check_in_date,
+            booking_data.check_out_date,
+            booking_data.guests
+        )["total"]
 
-    total_price = price_info["total"]
+    if total_price != Decimal(str(booking_data.total_price)).quantize(CENT):
+        raise HTTPException(status_code=400, detail="Произошла ошибка в цене")
 
-    if total_price == booking_data.total_price:
+    # Конфликт записи (SQLite "database is locked") повторяем ограниченное число раз
+    for attempt in range(BOOKING_WRITE_RETRIES):
         try:
-            booking = Booking(**booking_data.dict())
+            if not await reserve_occupancy(
+                db, accommodation, booking_data.check_in_date, booking_data.check_out_date
+            ):
+                await db.rollback()
+                raise HTTPException(status_code=400, detail="Уже забронировано")
+
+            booking = Booking(**booking_data.dict(exclude={"quote_token", "total_price"}), total_price=total_price)
             db.add(booking)
-            await db.flush()
             await db.commit()
             await db.refresh(booking)
+            break
+        except HTTPException:
+            raise
+        except OperationalError:
+            await db.rollback()
+            await db.refresh(accommodation)
+            await asyncio.sleep(random.uniform(0, 0.01 * 2 ** attempt))
         except Exception:
             await db.rollback()
             raise HTTPException(status_code=400, detail="Ошибка базы данных")
+    else:
+        raise HTTPException(status_code=503, detail="Сервис занят, повторите попытку")
 
-        return {"id": booking.id, "message": "Бронирование успешно создано"}
+    on_booking_committed(booking.accommodation_id, accommodation.type, booking.check_in_date, booking.check_out_date)
 
-    else:
-        raise HTTPException(status_code=400, detail="Произошла ошибка в цене")
\ No newline at end of file
+    return {"id": booking.id, "message": "Бронирование успешно создано"}
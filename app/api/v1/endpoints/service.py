@@ -1,24 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_async_db, get_db
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.core.serialization import ORJSONResponse, compile_serializer
+from app.db.session import get_async_db
 from app.models.service import Service, ServicePrice
 from app.schemas.service import ServiceSchema, ServiceCreateSchema
+from app.services.catalog_cache import CatalogSnapshot, catalog_cache
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import selectinload
 from app.utils.enums import Weekday
 
 router = APIRouter(prefix="/services", tags=["Services"])
+logger = logging.getLogger(__name__)
+
+serialize_service = compile_serializer(ServiceSchema)
 
 @router.get("/", response_model=list[ServiceSchema])
-async def get_service(db: AsyncSession = Depends(get_async_db)):
-    result = await db.execute(select(Service).options(selectinload(Service.prices)))
-    return result.scalars().all()
+async def get_service(request: Request, db: AsyncSession = Depends(get_async_db)):
+    snapshot = catalog_cache.get("services")
+    if snapshot is None:
+        result = await db.execute(select(Service).options(selectinload(Service.prices)))
+        snapshot = catalog_cache.set("services", None, CatalogSnapshot([
+            serialize_service(service) for service in result.scalars().all()
+        ]))
+    return snapshot.response(request)
 
 @router.get("/{service_id}", response_model=ServiceSchema)
 async def get_service_by_id(
     service_id: int,
     db: AsyncSession = Depends(get_async_db) ):
+    payload = catalog_cache.get("services", service_id)
+    if payload is not None:
+        return ORJSONResponse(payload)
+
     result = await db.execute(
         select(Service)
         .options(selectinload(Service.prices))
@@ -29,7 +43,8 @@ async def get_service_by_id(
     if service is None:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    return service
+    payload = serialize_service(service)
+    return ORJSONResponse(catalog_cache.set("services", service_id, payload))
 
 @router.post("/", response_model=ServiceSchema)
 async def create_service(
@@ -51,7 +66,7 @@ async def create_service(
     try:
         db.add(new_service)
         await db.flush()
-        print("Записали в базу банных - ", new_service)
+        logger.info("Записали услугу в базу: %s", new_service.name, extra={"service_id": new_service.id})
 
         if service_data.prices:
             for price in service_data.prices:
@@ -62,10 +77,11 @@ async def create_service(
                     duration_hours = price.duration_hours,
                     price=price.price,
                 ))
-                print( "Записываем цену: ", new_service.id)
+                logger.debug("Записываем цену услуги %s: %s", new_service.id, price.price)
 
         await db.commit()
         await db.refresh(new_service)
+        catalog_cache.invalidate("services")
 
         return new_service
 
@@ -1 +1,115 @@
-pass
\ No newline at end of file
+import secrets
+from dataclasses import dataclass
+from app.db.base import env
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """
+    Подключение к БД и настройки пула/SQLite, по ним движок строит app/db/engine.py.
+    Переменные окружения - с префиксом: DATABASE_URL, DATABASE_POOL_SIZE, DATABASE_SQLITE_JOURNAL_MODE и т.д.
+    """
+    url: str
+    # Пул соединений (PostgreSQL и другие серверные СУБД)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800  # Переоткрывать соединения старше N секунд
+    pool_pre_ping: bool = True  # Проверять соединение перед выдачей из пула
+    # SQLite: PRAGMA на каждое новое соединение
+    sqlite_journal_mode: str = "WAL"  # Читатели не блокируют писателя
+    sqlite_synchronous: str = "NORMAL"  # С WAL не теряет целостность, fsync только на checkpoint
+    sqlite_busy_timeout_ms: int = 5000  # Сколько ждать блокировку записи вместо "database is locked"
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    read_only: bool = False  # Пул только для чтения (для SQLite - PRAGMA query_only)
+
+    @property
+    def is_sqlite(self) -> bool:
+        return self.url.startswith("sqlite")
+
+    @property
+    def is_memory(self) -> bool:
+        return self.is_sqlite and (":memory:" in self.url or self.url.rstrip("/").endswith(":"))
+
+    @classmethod
+    def from_env(
+            cls,
+            prefix: str = "DATABASE",
+            url: str = "sqlite+aiosqlite:///./test.db",
+            read_only: bool = False
+    ) -> "DatabaseSettings":
+        defaults = cls(url=url, read_only=read_only)
+        return cls(
+            url=env.str(f"{prefix}_URL", url),
+            pool_size=env.int(f"{prefix}_POOL_SIZE", defaults.pool_size),
+            max_overflow=env.int(f"{prefix}_MAX_OVERFLOW", defaults.max_overflow),
+            pool_timeout=env.float(f"{prefix}_POOL_TIMEOUT", defaults.pool_timeout),
+            pool_recycle=env.int(f"{prefix}_POOL_RECYCLE", defaults.pool_recycle),
+            pool_pre_ping=env.bool(f"{prefix}_POOL_PRE_PING", defaults.pool_pre_ping),
+            sqlite_journal_mode=env.str(f"{prefix}_SQLITE_JOURNAL_MODE", defaults.sqlite_journal_mode),
+            sqlite_synchronous=env.str(f"{prefix}_SQLITE_SYNCHRONOUS", defaults.sqlite_synchronous),
+            sqlite_busy_timeout_ms=env.int(f"{prefix}_SQLITE_BUSY_TIMEOUT_MS", defaults.sqlite_busy_timeout_ms),
+            sqlite_mmap_size=env.int(f"{prefix}_SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+            sqlite_cache_size_kib=env.int(f"{prefix}_SQLITE_CACHE_SIZE_KIB", defaults.sqlite_cache_size_kib),
+            read_only=env.bool(f"{prefix}_READ_ONLY", defaults.read_only),
+        )
+
+
+# Основная БД приложения (по умолчанию - test.db в текущем каталоге, как в alembic.ini)
+DATABASE = DatabaseSettings.from_env("DATABASE")
+
+# БД для чтения (READ_DATABASE_URL, READ_DATABASE_POOL_SIZE, ...): реплика или, если URL не задан,
+# отдельный пул только на чтение к основной БД - поиск не занимает соединения, нужные для записи
+READ_DATABASE = DatabaseSettings.from_env("READ_DATABASE", url=DATABASE.url, read_only=True)
+
+# Проверка доступности: "sql" - запросы к accommodation_occupancy,
+# "matrix" - массивы занятости в памяти процесса (app/services/occupancy_matrix.py)
+AVAILABILITY_ENGINE = env.str("AVAILABILITY_ENGINE", "sql")
+
+# На сколько дней вперед от даты загрузки держим занятость в памяти
+OCCUPANCY_HORIZON_DAYS = env.int("OCCUPANCY_HORIZON_DAYS", 730)
+
+# Сколько секунд держим сериализованный каталог (размещения, услуги) в памяти
+CATALOG_CACHE_MAX_AGE = env.int("CATALOG_CACHE_MAX_AGE", 300)
+
+# Сколько раз повторяем создание брони при конфликте записи (SQLite "database is locked")
+BOOKING_WRITE_RETRIES = env.int("BOOKING_WRITE_RETRIES", 8)
+
+# Ключ подписи токенов расчета цены из /accommodations/find.
+# Если не задан, генерируется при старте - токены не переживут рестарт и не подойдут другим репликам
+SECRET_KEY = env.str("SECRET_KEY", None) or secrets.token_hex(32)
+
+# Сколько секунд действует токен расчета цены
+QUOTE_TOKEN_TTL = env.int("QUOTE_TOKEN_TTL", 900)
+
+# Idempotency-Key для POST /bookings/: сколько секунд и сколько ключей храним ответы (в памяти процесса)
+IDEMPOTENCY_TTL = env.int("IDEMPOTENCY_TTL", 24 * 60 * 60)
+IDEMPOTENCY_MAX_KEYS = env.int("IDEMPOTENCY_MAX_KEYS", 10000)
+
+# POST /bookings/bulk: сколько строк вставляем в одной транзакции
+BULK_IMPORT_CHUNK_SIZE = env.int("BULK_IMPORT_CHUNK_SIZE", 500)
+
+# GET /bookings/export: сколько строк читаем из курсора БД и отдаем клиенту за раз
+BOOKING_EXPORT_CHUNK_SIZE = env.int("BOOKING_EXPORT_CHUNK_SIZE", 1000)
+
+# /accommodations/find/flexible: максимум вариантов дат в одном запросе
+FLEXIBLE_SEARCH_MAX_CANDIDATES = env.int("FLEXIBLE_SEARCH_MAX_CANDIDATES", 100)
+
+# Middleware метрик и /metrics в формате Prometheus
+METRICS_ENABLED = env.bool("METRICS_ENABLED", True)
+
+# Логировать каждое SQL-выражение (логгер sqlalchemy.engine) - только для локальной отладки
+SQL_ECHO = env.bool("SQL_ECHO", False)
+
+# Профилировщик SQL: Server-Timing на каждый ответ, в режиме отладки - предупреждения о N+1
+# (одинаковое выражение выполнено за запрос SQL_N_PLUS_ONE_THRESHOLD и более раз)
+SQL_PROFILER_ENABLED = env.bool("SQL_PROFILER_ENABLED", True)
+SQL_PROFILER_DEBUG = env.bool("SQL_PROFILER_DEBUG", False)
+SQL_N_PLUS_ONE_THRESHOLD = env.int("SQL_N_PLUS_ONE_THRESHOLD", 5)
+
+# Логи: уровень, формат ("json" или "text") и доля записей INFO и ниже для шумных логгеров,
+# например LOG_SAMPLING=sqlalchemy.engine=0.01,app.api=0.1
+LOG_LEVEL = env.str("LOG_LEVEL", "INFO")
+LOG_FORMAT = env.str("LOG_FORMAT", "json")
+LOG_SAMPLING = env.dict("LOG_SAMPLING", {}, subcast_values=float)
@@ -0,0 +1,107 @@
+"""
+Логирование без блокировки event loop.
+
+Обработчик на корневом логгере только кладет запись в очередь, в stdout ее пишет
+QueueListener в отдельном потоке (JSON по строке на запись или обычный текст).
+Для шумных логгеров задается доля записей уровня INFO и ниже, которая доходит до вывода.
+Сообщения пишутся через logger.info("...%s", value): если уровень выключен, строка не форматируется.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+# Атрибуты LogRecord, которые не относятся к extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[QueueListener] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись в одну строку JSON: время, уровень, логгер, сообщение и поля из extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        payload.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_")
+        )
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю rate записей логгера (и его потомков) уровня INFO и ниже.
+    Предупреждения и ошибки проходят всегда.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Сначала самые длинные префиксы: app.api.v1 точнее, чем app.api
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + "."):
+                return random.random() < rate
+        return True
+
+
+class LocalQueueHandler(QueueHandler):
+    """
+    QueueHandler для слушателя в этом же процессе: запись не копируется и не форматируется
+    целиком, только сообщение собирается в потоке вызова (аргументы могут быть ORM-объектами).
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_logging(level: str = "INFO", log_format: str = "json", sampling: Optional[Dict[str, float]] = None,
+                  sql_echo: bool = False) -> QueueListener:
+    """Настраивает корневой логгер на очередь и запускает поток вывода (повторный вызов ничего не меняет)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(
+        JsonFormatter() if log_format == "json"
+        else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+    )
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = LocalQueueHandler(records)
+    if sampling:
+        handler.addFilter(SamplingFilter(sampling))
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(handler)
+
+    # SQL пишем через ту же очередь, а не синхронным обработчиком echo движка
+    if sql_echo:
+        logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO)
+
+    _listener = QueueListener(records, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
@@ -0,0 +1,235 @@
+"""
+Метрики в текстовом формате Prometheus без сторонних библиотек.
+
+Каждая реплика отдает свои значения на /metrics, агрегирует их Prometheus.
+Запись метрики - поиск серии в словаре и bisect по границам гистограммы,
+поэтому middleware добавляет к запросу единицы микросекунд.
+"""
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Metric:
+    """Общая часть: имя, описание, имена меток и серии по кортежу значений меток"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[tuple, object] = {}
+
+    def _labels(self, labels: tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(self.labelnames, labels)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self._series.items():
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        yield from self.samples()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """Значение меняется через inc/dec или считывается функцией в момент сбора"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[tuple, float]]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1) -> None:
+        self._series[labels] = self._series.get(labels, 0) - amount
+
+    def samples(self) -> Iterator[str]:
+        if self.collect is not None:
+            self._series = dict(self.collect())
+        yield from super().samples()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            # Счетчики по корзинам (последняя - +Inf) и сумма значений
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{self._labels(labels, le)} {cumulative}"
+            yield f"{self.name}_sum{self._labels(labels)} {total}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Время обработки запроса", ("method", "route", "status")
+))
+RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "Размер тела ответа", ("method", "route"), buckets=SIZE_BUCKETS
+))
+REQUESTS_IN_PROGRESS = registry.register(Gauge(
+    "http_requests_in_progress", "Запросы в обработке", ("method",)
+))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: время, код и размер ответа каждого запроса.
+    Маршрут берется из scope["route"] (его выставляет роутер FastAPI) в виде шаблона,
+    например /bookings/{booking_id}, чтобы число серий не зависело от id в URL.
+    """
+
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc((method,))
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            REQUEST_DURATION.observe((method, route, status), time.perf_counter() - started)
+            RESPONSE_SIZE.observe((method, route), size)
+            REQUESTS_IN_PROGRESS.dec((method,))
+
+
+def instrument_engine(engine, name: str = "default") -> Callable[[], None]:
+    """
+    Метрики пула соединений движка: выдачи соединений, время получения соединения из пула
+    (ожидание свободного + открытие нового) и состояние пула на момент сбора.
+    Возвращает функцию, которая снимает метрики с пула (для движков, закрываемых раньше приложения).
+    """
+    from sqlalchemy import event
+
+    pool = engine.sync_engine.pool if hasattr(engine, "sync_engine") else engine.pool
+    labels = (name,)
+    entry = (name, pool)
+    _pools.append(entry)
+
+    def on_checkout(*args):
+        POOL_CHECKOUTS.inc(labels)
+
+    event.listen(pool, "checkout", on_checkout)
+
+    # У пула нет события "запрошено соединение", поэтому замеряем сам вызов получения
+    do_get = pool._do_get
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(labels, time.perf_counter() - started)
+
+    pool._do_get = timed_do_get
+
+    def uninstrument() -> None:
+        _pools.remove(entry)
+        event.remove(pool, "checkout", on_checkout)
+        pool._do_get = do_get
+
+    return uninstrument
+
+
+def _pool_state() -> Dict[tuple, float]:
+    return {
+        (name, state): getattr(pool, state)()
+        for name, pool in _pools
+        for state in ("checkedout", "checkedin", "overflow", "size")
+        if hasattr(pool, state)  # У StaticPool/NullPool части счетчиков нет
+    }
+
+
+_pools: List[Tuple[str, object]] = []
+
+POOL_CHECKOUTS = registry.register(Counter(
+    "db_pool_checkouts_total", "Выдано соединений из пула", ("engine",)
+))
+POOL_CHECKOUT_WAIT = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Время получения соединения из пула", ("engine",)
+))
+POOL_CONNECTIONS = registry.register(Gauge(
+    "db_pool_connections", "Соединения пула по состоянию", ("engine", "state"), collect=_pool_state
+))
+
+
+def metrics_response() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1 +1,74 @@
-pass
\ No newline at end of file
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple, Optional
+
+from app.core.config import QUOTE_TOKEN_TTL, SECRET_KEY
+
+
+class QuoteTokenError(ValueError):
+    """Токен расчета цены испорчен, подделан или просрочен"""
+
+
+class Quote(NamedTuple):
+    accommodation_id: int
+    check_in_date: date
+    check_out_date: date
+    guests: int
+    total: Decimal
+    expires_at: int
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def _signature(body: str) -> str:
+    return _b64encode(hmac.new(SECRET_KEY.encode(), body.encode(), hashlib.sha256).digest())
+
+
+def sign_quote(
+        accommodation_id: int,
+        check_in_date: date,
+        check_out_date: date,
+        guests: int,
+        total: Decimal,
+        now: Optional[float] = None
+) -> str:
+    """Подписывает расчет цены из /find, чтобы POST /bookings/ не пересчитывал ее заново"""
+    expires_at = int((now or time.time()) + QUOTE_TOKEN_TTL)
+    payload = "|".join([
+        str(accommodation_id), check_in_date.isoformat(), check_out_date.isoformat(),
+        str(guests), str(total), str(expires_at),
+    ])
+    body = _b64encode(payload.encode())
+    return f"{body}.{_signature(body)}"
+
+
+def verify_quote(token: str, now: Optional[float] = None) -> Quote:
+    """Проверяет подпись (сравнение за постоянное время) и срок действия токена"""
+    body, _, signature = token.partition(".")
+    if not hmac.compare_digest(signature.encode(), _signature(body).encode()):
+        raise QuoteTokenError("Неверная подпись расчета цены")
+
+    try:
+        accommodation_id, check_in, check_out, guests, total, expires_at = _b64decode(body).decode().split("|")
+        quote = Quote(
+            int(accommodation_id), date.fromisoformat(check_in), date.fromisoformat(check_out),
+            int(guests), Decimal(total), int(expires_at),
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, InvalidOperation):
+        raise QuoteTokenError("Некорректный расчет цены")
+
+    if quote.expires_at < (now or time.time()):
+        raise QuoteTokenError("Расчет цены устарел, выполните поиск заново")
+
+    return quote
@@ -0,0 +1,113 @@
+"""
+Быстрая сериализация ответов API.
+
+compile_serializer(Schema) один раз разбирает поля схемы Pydantic и собирает функцию,
+которая превращает ORM-объект (или словарь) в словарь для orjson без валидации:
+данные из БД считаются доверенными. Преобразования, которые меняют ответ, сохраняются -
+float для Decimal, вложенные схемы, постобработка полей валидаторами схемы (format_time_output).
+Результат совпадает с jsonable_encoder(Schema.from_orm(obj)), это проверяют тесты.
+"""
+import inspect
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache, partial
+from typing import Any, Callable, Optional, Type
+
+import orjson
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON, ModelField
+from starlette.responses import JSONResponse
+
+Serializer = Callable[[Any], dict]
+
+# Типы, которые orjson пишет сам так же, как jsonable_encoder
+_NATIVE_TYPES = (str, int, bool, date, datetime, time, Enum, dict)
+
+
+def _default(value: Any) -> Any:
+    """Типы, которые orjson не знает"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON-ответ через orjson: содержимое - уже готовые словари (например, от compile_serializer)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _type_converter(type_: Any) -> Optional[Callable[[Any], Any]]:
+    """Преобразование значения поля; None - значение отдается orjson как есть"""
+    if isinstance(type_, type):
+        if issubclass(type_, BaseModel):
+            return compile_serializer(type_)
+        if issubclass(type_, float):
+            return float  # Numeric из БД приходит как Decimal
+        if issubclass(type_, _NATIVE_TYPES):
+            return None
+    raise TypeError(f"Тип поля {type_!r} не поддерживается compile_serializer")
+
+
+def _field_converter(schema: Type[BaseModel], field: ModelField) -> Optional[Callable[[Any], Any]]:
+    convert = _type_converter(field.type_)
+
+    if field.shape == SHAPE_LIST:
+        if convert is not None:
+            item_convert = convert
+            convert = lambda values: [item_convert(value) for value in values]
+    elif field.shape != SHAPE_SINGLETON:
+        raise TypeError(f"{schema.__name__}.{field.name}: поддерживаются только поля и списки")
+
+    # Валидаторы после приведения типа меняют выходное значение - применяем их так же, как Pydantic
+    validators = []
+    for validator in field.class_validators.values():
+        if validator.pre:
+            continue
+        if validator.each_item or len(inspect.signature(validator.func).parameters) != 2:
+            raise TypeError(f"{schema.__name__}.{field.name}: поддерживаются валидаторы вида (cls, v)")
+        validators.append(validator.func)
+
+    if validators:
+        type_convert = convert
+
+        def convert(value):
+            if type_convert is not None:
+                value = type_convert(value)
+            for func in validators:
+                value = func(schema, value)
+            return value
+
+    if convert is not None and field.allow_none:
+        not_none_convert = convert
+        convert = lambda value: None if value is None else not_none_convert(value)
+
+    return convert
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(schema: Type[BaseModel]) -> Serializer:
+    """Собирает сериализатор схемы: ORM-объект или словарь -> словарь с полями схемы"""
+    fields = [
+        (name, field.default, _field_converter(schema, field))
+        for name, field in schema.__fields__.items()
+    ]
+
+    def serialize(obj: Any) -> dict:
+        get = obj.get if isinstance(obj, dict) else partial(getattr, obj)
+        result = {}
+        for name, default, convert in fields:
+            value = get(name, default)
+            result[name] = value if convert is None else convert(value)
+        return result
+
+    serialize.__qualname__ = f"serialize_{schema.__name__}"
+    return serialize
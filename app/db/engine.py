@@ -0,0 +1,67 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import DatabaseSettings
+
+
+def sqlite_pragmas(settings: DatabaseSettings) -> dict:
+    """PRAGMA, которые выполняются на каждом новом соединении SQLite"""
+    pragmas = {
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "cache_size": -settings.sqlite_cache_size_kib,  # Отрицательное значение - размер в КиБ
+    }
+    if settings.read_only:
+        pragmas["query_only"] = "ON"
+    if not settings.is_memory:
+        pragmas.update({
+            "journal_mode": settings.sqlite_journal_mode,
+            "synchronous": settings.sqlite_synchronous,
+            "mmap_size": settings.sqlite_mmap_size,
+        })
+    return pragmas
+
+
+def _engine_options(settings: DatabaseSettings) -> dict:
+    if settings.is_memory:
+        # База в памяти живет в одном соединении - SQLAlchemy сам берет StaticPool
+        return {"connect_args": {"check_same_thread": False}}
+
+    if settings.is_sqlite:
+        # Для файла aiosqlite по умолчанию дает NullPool (новое соединение и все PRAGMA на каждую сессию),
+        # поэтому пул задаем явно. recycle и pre_ping для локального файла не нужны
+        return {
+            "connect_args": {"check_same_thread": False},
+            "poolclass": AsyncAdaptedQueuePool,
+            "pool_size": settings.pool_size,
+            "max_overflow": settings.max_overflow,
+            "pool_timeout": settings.pool_timeout,
+        }
+
+    return {
+        "pool_size": settings.pool_size,
+        "max_overflow": settings.max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_recycle": settings.pool_recycle,
+        "pool_pre_ping": settings.pool_pre_ping,
+    }
+
+
+def _install_sqlite_pragmas(engine: Engine, settings: DatabaseSettings) -> None:
+    pragmas = sqlite_pragmas(settings)
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def create_async_engine_from_settings(settings: DatabaseSettings) -> AsyncEngine:
+    """Единая точка создания асинхронного движка: пул для серверных СУБД, PRAGMA для SQLite"""
+    engine = create_async_engine(settings.url, **_engine_options(settings))
+    if settings.is_sqlite:
+        _install_sqlite_pragmas(engine.sync_engine, settings)
+    return engine
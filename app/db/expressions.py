@@ -0,0 +1,22 @@
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+class selective(FunctionElement):
+    """
+    Подсказка планировщику: условие отбирает малую долю строк.
+    SQLite без статистики (ANALYZE) иначе предпочитает пройти индекс сортировки целиком.
+    На остальных СУБД выводится как само условие.
+    """
+    name = "selective"
+    inherit_cache = True
+
+
+@compiles(selective)
+def _compile_selective(element, compiler, **kw):
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(selective, "sqlite")
+def _compile_selective_sqlite(element, compiler, **kw):
+    return "likelihood(%s, 0.05)" % compiler.process(element.clauses, **kw)
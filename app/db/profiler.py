@@ -0,0 +1,115 @@
+"""
+Профилировщик SQL по запросам: сколько выражений выполнено и сколько времени ушло в БД.
+
+Счетчик живет в contextvar, который middleware выставляет на каждый HTTP-запрос, а события
+движка (before/after_cursor_execute) его пополняют - контекст доходит до них и через greenlet
+асинхронного движка. Итог отдается в заголовке Server-Timing: db;dur=12.3;desc="5 queries".
+В режиме отладки повторяющиеся выражения одной формы (N+1) пишутся в лог предупреждением.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+_profile: ContextVar[Optional["QueryProfile"]] = ContextVar("query_profile", default=None)
+
+# Списки параметров IN (?, ?, ?) разной длины считаем одной формой выражения
+_PARAMETER_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)")
+
+
+def statement_shape(statement: str) -> str:
+    return " ".join(_PARAMETER_LIST.sub("(?)", statement).split())
+
+
+class QueryProfile:
+    """SQL-статистика одного запроса"""
+
+    __slots__ = ("count", "duration", "shapes")
+
+    def __init__(self, track_shapes: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Optional[Counter] = Counter() if track_shapes else None
+
+    def repeated(self, threshold: int) -> list:
+        """Формы выражений, выполненные не меньше threshold раз: [(форма, сколько раз)]"""
+        if self.shapes is None:
+            return []
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.duration * 1000:.2f};desc="{self.count} queries"'
+
+
+def current_profile() -> Optional[QueryProfile]:
+    return _profile.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    if profile is None or context is None:
+        return
+    context._profiler_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _profile.get()
+    started = getattr(context, "_profiler_started", None)
+    if profile is None or started is None:
+        return
+
+    profile.count += 1
+    profile.duration += time.perf_counter() - started
+    if profile.shapes is not None:
+        profile.shapes[statement_shape(statement)] += 1
+
+
+def install_query_profiler(engine) -> None:
+    """Подключает счетчики к движку (повторный вызов ничего не меняет)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryProfilerMiddleware:
+    """
+    ASGI middleware: заводит QueryProfile на запрос и добавляет Server-Timing к ответу.
+    Учитываются выражения, выполненные до начала ответа (у потоковых ответов - до первого блока).
+    При debug=True выражения одной формы, повторенные threshold и более раз, пишутся в лог как N+1.
+    """
+
+    def __init__(self, app: ASGIApp, debug: bool = False, threshold: int = 5):
+        self.app = app
+        self.debug = debug
+        self.threshold = threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = QueryProfile(track_shapes=self.debug)
+        token = _profile.set(profile)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _profile.reset(token)
+            for shape, count in profile.repeated(self.threshold):
+                route = getattr(scope.get("route"), "path", scope["path"])
+                logger.warning("Возможный N+1 в %s %s: %s раз выполнено %s", scope["method"], route, count, shape)
@@ -1,26 +1,28 @@
 from sqlalchemy import inspect
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import declarative_base
+import logging
+from app.core.config import DATABASE, READ_DATABASE, DatabaseSettings
 from app.db.base import Base, BASE_DIR, env
+from app.db.engine import create_async_engine_from_settings
 
-# Конфигурация для SQLite
-DATABASE_URL = env("DATABASE_URL")
+logger = logging.getLogger(__name__)
+
+# Конфигурация БД - app/core/config.py (DATABASE_URL, пул, PRAGMA для SQLite)
+DATABASE_URL = DATABASE.url
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
-# Создаем движки
-async_engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    connect_args={"check_same_thread": False},
-    future=True
-)
+# Создаем движки (SQL в лог - через SQL_ECHO и общий логгер app/core/log.py)
+async_engine = create_async_engine_from_settings(DATABASE)
 
-test_async_engine = create_async_engine(
-    TEST_DATABASE_URL,
-    echo=False,
-    connect_args={"check_same_thread": False},
-    future=True
-)
+# Движок для чтения: реплика или пул только на чтение к той же БД.
+# База в памяти у каждого движка своя, поэтому для нее читаем через основной движок
+if READ_DATABASE.url == DATABASE.url and DATABASE.is_memory:
+    read_async_engine = async_engine
+else:
+    read_async_engine = create_async_engine_from_settings(READ_DATABASE)
+
+test_async_engine = create_async_engine_from_settings(DatabaseSettings(url=TEST_DATABASE_URL))
 
 # Фабрики сессий
 AsyncSessionLocal = async_sessionmaker(
@@ -29,6 +31,12 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False
 )
 
+ReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
 
 # Чтобы были обязательно миграции
 async def init_db():
@@ -46,7 +54,7 @@ async def init_db():
                     f"Возможно, ты забыл применить миграции: `alembic upgrade head`"
                 )
             else:
-                print("✅ Все нужные таблицы найдены.")
+                logger.info("Все нужные таблицы найдены")
 
         await conn.run_sync(check_tables)
 
@@ -66,20 +74,18 @@ async def get_async_db() -> AsyncSession:
             await db.close()
 
 
-# синхронная база для ранее созданных шаблонов для записи
-
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
-
-sync_engine = create_engine(env("SYNC_DATABASE_URL"))
-SessionLocal = sessionmaker(bind=sync_engine)
+async def get_async_read_db() -> AsyncSession:
+    """
+    Сессия для GET-эндпоинтов на движке чтения. Реплика может отставать,
+    поэтому чтение сразу после записи (например, бронь по id после создания) и заполнение
+    кэша каталога (размещения, услуги, календари) - через get_async_db
+    """
+    async with ReadSessionLocal() as db:
+        try:
+            yield db
+        finally:
+            await db.close()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
 # DATABASE_URL = "sqlite:///./test.db"  # Для разработки
 # engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
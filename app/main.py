@@ -1,14 +1,48 @@
 from fastapi import FastAPI
-from app.db.session import async_engine, init_db, Base
+import logging
+from app.core.config import (AVAILABILITY_ENGINE, LOG_FORMAT, LOG_LEVEL, LOG_SAMPLING, METRICS_ENABLED,
+                             SQL_ECHO, SQL_N_PLUS_ONE_THRESHOLD, SQL_PROFILER_DEBUG, SQL_PROFILER_ENABLED)
+from app.core.log import setup_logging
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_response
+from app.db.profiler import QueryProfilerMiddleware, install_query_profiler
+from app.db.session import async_engine, read_async_engine, init_db, Base, AsyncSessionLocal
+from app.services.occupancy_matrix import occupancy_matrix, verify_occupancy_matrix
 from app.api.v1.endpoints import accommodation, service, accommodation_add, booking
 
+setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLING, sql_echo=SQL_ECHO)
+
 app = FastAPI(title="Resort API")
 
+if SQL_PROFILER_ENABLED:
+    app.add_middleware(QueryProfilerMiddleware, debug=SQL_PROFILER_DEBUG, threshold=SQL_N_PLUS_ONE_THRESHOLD)
+    install_query_profiler(async_engine)
+    install_query_profiler(read_async_engine)
+
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine)
+    if read_async_engine is not async_engine:
+        instrument_engine(read_async_engine, "read")
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Метрики процесса в текстовом формате Prometheus"""
+        return metrics_response()
+
 @app.on_event("startup")
 async def on_startup():
     """Инициализация при старте приложения"""
     await init_db()
 
+    if AVAILABILITY_ENGINE == "matrix":
+        async with AsyncSessionLocal() as db:
+            await occupancy_matrix.load(db)
+            mismatches = await verify_occupancy_matrix(db)
+        if mismatches:
+            logging.getLogger(__name__).warning(
+                "Матрица занятости расходится с accommodation_occupancy: %s", mismatches[:10]
+            )
+
 app.include_router(accommodation_add.router)
 app.include_router(accommodation.router)
 app.include_router(booking.router)
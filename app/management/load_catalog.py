@@ -0,0 +1,195 @@
+"""
+Массовая загрузка каталога (размещения, услуги и их цены) из JSON или CSV.
+
+    python -m app.management.load_catalog catalog.json
+    python -m app.management.load_catalog path/to/csv_dir --database-url sqlite+aiosqlite:///./test.db
+
+JSON: {"accommodations": [{..., "prices": [...]}], "services": [{..., "prices": [...]}]} -
+поля как в POST /accommodations/ и POST /services/.
+CSV: каталог с файлами accommodations.csv, accommodation_prices.csv (колонка accommodation_name),
+services.csv, service_prices.csv (колонка service_name); отсутствующие файлы пропускаются.
+
+Размещения и услуги сопоставляются по названию: существующие обновляются, новые добавляются,
+цены загруженных объектов заменяются целиком. Уникальности названий в БД нет, поэтому если
+загружаемое название уже встречается в БД несколько раз, загрузка отклоняется целиком. Все выполняется в одной транзакции,
+поэтому повторный запуск с теми же данными дает тот же результат.
+"""
+import argparse
+import asyncio
+import csv
+import json
+from datetime import time
+from pathlib import Path
+from typing import Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.models.accommodation import Accommodation, AccommodationPrice
+from app.models.service import Service, ServicePrice
+from app.schemas.accommodation import AccommodationCreateSchema
+from app.schemas.service import ServiceCreateSchema
+
+
+def read_catalog(path: Path) -> dict:
+    """Читает каталог из JSON-файла или из каталога с CSV-файлами"""
+    if path.is_dir():
+        return _read_csv_catalog(path)
+
+    with path.open(encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _read_csv(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    with path.open(encoding="utf-8", newline="") as f:
+        # Пустые ячейки считаем отсутствующими значениями
+        return [{key: value for key, value in row.items() if value != ""} for row in csv.DictReader(f)]
+
+
+def _read_csv_catalog(directory: Path) -> dict:
+    catalog = {}
+    for section, prices_file, parent_key in (
+        ("accommodations", "accommodation_prices.csv", "accommodation_name"),
+        ("services", "service_prices.csv", "service_name"),
+    ):
+        items = _read_csv(directory / f"{section}.csv")
+        prices: Dict[str, list] = {}
+        for price in _read_csv(directory / prices_file):
+            prices.setdefault(price.pop(parent_key), []).append(price)
+        for item in items:
+            item["prices"] = prices.get(item["name"], [])
+        catalog[section] = items
+    return catalog
+
+
+def _validate(items: List[dict], schema: Type[BaseModel], section: str) -> List[BaseModel]:
+    validated, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            validated.append(schema.parse_obj(item))
+        except ValidationError as e:
+            errors.append(f"{section}[{index}] {item.get('name')!r}: {e}")
+
+    # Название - ключ сопоставления, дубли в одном файле не разрешаем
+    names = [item.name for item in validated]
+    errors.extend(
+        f"{section}: название {name!r} встречается несколько раз"
+        for name in sorted({name for name in names if names.count(name) > 1})
+    )
+    if errors:
+        raise ValueError("Каталог не загружен:\n" + "\n".join(errors))
+    return validated
+
+
+async def _duplicate_names(db: AsyncSession, model, names: List[str], section: str) -> List[str]:
+    """Загружаемые названия, которые уже встречаются в БД несколько раз - по ним нельзя сопоставить запись"""
+    if not names:
+        return []
+    result = await db.execute(
+        select(model.name, func.count())
+        .where(model.name.in_(names))
+        .group_by(model.name)
+        .having(func.count() > 1)
+        .order_by(model.name)
+    )
+    return [f"{section}: название {name!r} в базе у {total} записей" for name, total in result]
+
+
+async def _upsert_by_name(db: AsyncSession, model, rows: List[dict]) -> Tuple[Dict[str, int], int, int]:
+    """Вставляет новые и обновляет существующие записи по названию, возвращает {название: id}"""
+    names = [row["name"] for row in rows]
+    result = await db.execute(select(model.name, model.id).where(model.name.in_(names)))
+    ids = dict(result.all())
+
+    new_rows = [row for row in rows if row["name"] not in ids]
+    existing_rows = [{**row, "id": ids[row["name"]]} for row in rows if row["name"] in ids]
+
+    if new_rows:
+        result = await db.execute(insert(model).returning(model.name, model.id), new_rows)
+        ids.update(result.all())
+    if existing_rows:
+        await db.execute(update(model), existing_rows)
+
+    return ids, len(new_rows), len(existing_rows)
+
+
+async def load_catalog(db: AsyncSession, catalog: dict) -> dict:
+    """Загружает каталог в одной транзакции и возвращает счетчики добавленных/обновленных записей"""
+    accommodations = _validate(catalog.get("accommodations", []), AccommodationCreateSchema, "accommodations")
+    services = _validate(catalog.get("services", []), ServiceCreateSchema, "services")
+    stats = {}
+
+    async with db.begin():
+        errors = (
+            await _duplicate_names(db, Accommodation, [item.name for item in accommodations], "accommodations")
+            + await _duplicate_names(db, Service, [item.name for item in services], "services")
+        )
+        if errors:
+            raise ValueError("Каталог не загружен:\n" + "\n".join(errors))
+
+        if accommodations:
+            ids, created, updated = await _upsert_by_name(db, Accommodation, [
+                {
+                    **item.dict(exclude={"prices"}),
+                    "check_in_time": item.check_in_time or time(15, 0),
+                    "check_out_time": item.check_out_time or time(12, 0),
+                }
+                for item in accommodations
+            ])
+            await db.execute(delete(AccommodationPrice).where(AccommodationPrice.accommodation_id.in_(ids.values())))
+            prices = [
+                {"accommodation_id": ids[item.name], **price.dict()}
+                for item in accommodations for price in item.prices
+            ]
+            if prices:
+                await db.execute(insert(AccommodationPrice), prices)
+            stats["accommodations"] = {"created": created, "updated": updated, "prices": len(prices)}
+
+        if services:
+            ids, created, updated = await _upsert_by_name(
+                db, Service, [item.dict(exclude={"prices"}) for item in services]
+            )
+            await db.execute(delete(ServicePrice).where(ServicePrice.service_id.in_(ids.values())))
+            prices = [
+                {"service_id": ids[item.name], **price.dict()}
+                for item in services for price in item.prices or []
+            ]
+            if prices:
+                await db.execute(insert(ServicePrice), prices)
+            stats["services"] = {"created": created, "updated": updated, "prices": len(prices)}
+
+    return stats
+
+
+async def main(path: Path, database_url: str = None) -> dict:
+    catalog = read_catalog(path)
+
+    # Конфиг читает DATABASE_URL при импорте - импортируем при запуске, а не при загрузке модуля
+    from app.core.config import DatabaseSettings
+    from app.db.engine import create_async_engine_from_settings
+
+    if database_url:
+        engine = create_async_engine_from_settings(DatabaseSettings(url=database_url))
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    else:
+        from app.db.session import AsyncSessionLocal, async_engine
+        engine, session_factory = async_engine, AsyncSessionLocal
+
+    try:
+        async with session_factory() as db:
+            return await load_catalog(db, catalog)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Массовая загрузка каталога размещений и услуг")
+    parser.add_argument("path", type=Path, help="JSON-файл или каталог с CSV-файлами")
+    parser.add_argument("--database-url", help="URL базы (по умолчанию DATABASE_URL из окружения)")
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(main(args.path, args.database_url)), ensure_ascii=False))
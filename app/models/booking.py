@@ -1,5 +1,5 @@
 from sqlalchemy import (Date, DateTime, Column, Integer, String,
-                        Text, ForeignKey, DECIMAL, Boolean, Enum)
+                        Text, ForeignKey, DECIMAL, Boolean, Enum, Index)
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 from sqlalchemy.sql import func
@@ -19,4 +19,19 @@ class Booking(Base):
     total_price = Column(DECIMAL(10, 2), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
-    accommodation = relationship("Accommodation", lazy="selectin")
\ No newline at end of file
+    accommodation = relationship("Accommodation", lazy="selectin")
+
+    __table_args__ = (
+        Index("ix_bookings_created_at_id", "created_at", "id"),  # Пагинация GET /bookings/ по ключу
+        Index("ix_bookings_accommodation_dates", "accommodation_id", "check_in_date", "check_out_date"),
+        Index("ix_bookings_check_out_check_in", "check_out_date", "check_in_date"),  # Брони на дату
+    )
+
+
+class AccommodationOccupancy(Base):
+    """Сколько единиц размещения занято в конкретный день (ведется при каждой брони)"""
+    __tablename__ = "accommodation_occupancy"
+
+    accommodation_id = Column(Integer, ForeignKey("accommodations.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    booked_units = Column(Integer, nullable=False, default=0)
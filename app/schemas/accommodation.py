@@ -54,6 +54,18 @@ class AccommodationShortSchema(BaseModel):
         orm_mode = True
 
 
+class CalendarDaySchema(BaseModel):
+    date: date
+    free_units: int  # Сколько единиц еще можно забронировать
+    price: Optional[float] = None  # Цена ночи без доп. мест (для gazebo - дня)
+
+
+class AccommodationCalendarSchema(BaseModel):
+    accommodation_id: int
+    month: str
+    days: List[CalendarDaySchema]
+
+
 class AccommodationCreateSchema(BaseModel):
     name: str
     type: AccommodationType
@@ -33,6 +33,7 @@ class BookingCreateSchema(BaseModel):
     guest_email: EmailStr
     notes: Optional[str] = None
     total_price: float
+    quote_token: Optional[str] = None  # Подписанный расчет цены из /accommodations/find
 
 
 class AvailableAccommodationSchema(BaseModel):
@@ -41,6 +42,24 @@ class AvailableAccommodationSchema(BaseModel):
     nights: int
     requires_extra_bed: bool
     prices: List[dict]  # Подробная информация по ценам за каждую ночь
+    quote_token: str  # Передается в POST /bookings/ вместо повторного расчета цены
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class FlexibleOptionSchema(BaseModel):
+    check_in_date: date
+    check_out_date: date
+    nights: int
+    free_units: int
+    total_price: float
+    quote_token: str
+
+
+class FlexibleAvailabilitySchema(BaseModel):
+    accommodation: AccommodationSchema
+    requires_extra_bed: bool
+    options: List[FlexibleOptionSchema]  # Свободные варианты дат с ценой
+
+    class Config:
+        orm_mode = True
@@ -0,0 +1,54 @@
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.accommodation import Accommodation
+from app.services.booking_service import load_occupancy
+from app.services.catalog_cache import catalog_cache
+from app.services.price_calendar import NO_PRICE, from_cents, get_price_calendar
+
+
+def parse_month(month: str) -> Tuple[date, date]:
+    """'YYYY-MM' -> (первый день месяца, первый день следующего)"""
+    start = date.fromisoformat(f"{month}-01")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+async def get_calendars(db: AsyncSession, accommodations: List[Accommodation], month: str) -> List[dict]:
+    """
+    Календарь на месяц для каждого размещения: свободные единицы (count минус занятые)
+    и цена ночи (дня для gazebo) без доп. мест по тем же правилам, что _find_price_for_date.
+    Занятость всех размещений без кэша загружается одним запросом к accommodation_occupancy.
+    Календари кэшируются по (размещение, месяц) и сбрасываются при брони в этом месяце.
+    """
+    start, end = parse_month(month)
+    calendars = {
+        accommodation.id: catalog_cache.get("calendar", (accommodation.id, month))
+        for accommodation in accommodations
+    }
+
+    missing = [accommodation for accommodation in accommodations if calendars[accommodation.id] is None]
+    if missing:
+        days = (end - start).days
+        occupancy = await load_occupancy(db, [accommodation.id for accommodation in missing], start, end)
+
+        for accommodation in missing:
+            free_units = (accommodation.count - occupancy[accommodation.id]).clip(min=0)
+            prices = get_price_calendar(accommodation).daily(start, days)
+
+            calendars[accommodation.id] = catalog_cache.set("calendar", (accommodation.id, month), {
+                "accommodation_id": accommodation.id,
+                "month": month,
+                "days": [
+                    {
+                        "date": (start + timedelta(days=offset)).isoformat(),
+                        "free_units": units,
+                        "price": None if price == NO_PRICE else float(from_cents(price)),
+                    }
+                    for offset, (units, price) in enumerate(zip(free_units.tolist(), prices.tolist()))
+                ],
+            })
+
+    return [calendars[accommodation.id] for accommodation in accommodations]
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import BOOKING_EXPORT_CHUNK_SIZE
+from app.models.accommodation import Accommodation
+from app.models.booking import Booking
+
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+# Колонки выгрузки в порядке CSV
+EXPORT_COLUMNS = (
+    Booking.id,
+    Booking.accommodation_id,
+    Accommodation.name.label("accommodation_name"),
+    Booking.check_in_date,
+    Booking.check_out_date,
+    Booking.guests,
+    Booking.guest_name,
+    Booking.guest_phone,
+    Booking.guest_email,
+    Booking.notes,
+    Booking.total_price,
+    Booking.created_at,
+)
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+# С этих символов Excel и LibreOffice начинают формулу: такие ячейки CSV экранируются апострофом.
+# Экранируется только свободный текст гостя - телефоны (+7...) и суммы остаются как есть
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+CSV_FREE_TEXT_COLUMNS = {EXPORT_FIELDS.index("guest_name"), EXPORT_FIELDS.index("notes")}
+
+
+def export_query(date_from: Optional[date], date_to: Optional[date]):
+    """Брони с датой заезда в [date_from, date_to] - только колонки, без ORM-объектов"""
+    query = select(*EXPORT_COLUMNS).join(Accommodation, Accommodation.id == Booking.accommodation_id)
+    if date_from:
+        query = query.where(Booking.check_in_date >= date_from)
+    if date_to:
+        query = query.where(Booking.check_in_date <= date_to)
+    return query.order_by(Booking.id)
+
+
+def _to_json(value):
+    if isinstance(value, date):  # date и datetime
+        return value.isoformat()
+    return float(value)  # DECIMAL, как total_price в GET /bookings/
+
+
+def _csv_row(row: tuple) -> list:
+    """Имя и заметки гостя не должны выполниться как формула при открытии CSV"""
+    return [
+        "'" + value if index in CSV_FREE_TEXT_COLUMNS and value and value.startswith(CSV_FORMULA_PREFIXES) else value
+        for index, value in enumerate(row)
+    ]
+
+
+def _format_csv(rows: List[tuple], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(_csv_row(row) for row in rows)
+    return buffer.getvalue()
+
+
+def _format_ndjson(rows: List[tuple]) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_FIELDS, row)), ensure_ascii=False, default=_to_json) + "\n"
+        for row in rows
+    )
+
+
+async def export_bookings(
+        db: AsyncSession,
+        export_format: str,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        chunk_size: Optional[int] = None
+) -> AsyncIterator[bytes]:
+    """
+    Выгрузка броней для StreamingResponse.
+    Строки читаются серверным курсором (AsyncSession.stream) пачками по chunk_size,
+    каждая пачка сразу форматируется и отдается клиенту - память не зависит от объема выгрузки.
+    """
+    chunk_size = chunk_size or BOOKING_EXPORT_CHUNK_SIZE
+    result = await db.stream(export_query(date_from, date_to).execution_options(yield_per=chunk_size))
+
+    if export_format == "csv":
+        header = True
+        async for rows in result.partitions():
+            yield _format_csv(rows, header).encode()
+            header = False
+        if header:  # Пустая выгрузка - только заголовок
+            yield _format_csv([], header).encode()
+    else:
+        async for rows in result.partitions():
+            yield _format_ndjson(rows).encode()
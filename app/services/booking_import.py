@@ -0,0 +1,212 @@
+import json
+from collections import Counter
+from datetime import timedelta
+from typing import Any, List, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import BULK_IMPORT_CHUNK_SIZE
+from app.models.accommodation import Accommodation
+from app.models.booking import AccommodationOccupancy, Booking
+from app.schemas.booking import BookingCreateSchema
+from app.services.booking_service import dialect_insert, load_occupancy, on_booking_committed
+from app.utils.enums import AccommodationType
+
+
+class InvalidRow:
+    """Строка NDJSON, которую не удалось разобрать"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def parse_bulk_body(body: bytes, content_type: str) -> List[Any]:
+    """
+    Разбирает тело POST /bookings/bulk: NDJSON (по строке на бронь) или JSON-массив.
+    Ошибка в отдельной строке NDJSON отклоняет только эту строку.
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as e:
+                rows.append(InvalidRow(f"Некорректный JSON: {e}"))
+        return rows
+
+    rows = json.loads(body)
+    if not isinstance(rows, list):
+        raise ValueError("Ожидается JSON-массив бронирований")
+    return rows
+
+
+def _rejected(index: int, error: Any) -> dict:
+    return {"row": index, "status": "rejected", "error": error}
+
+
+async def import_bookings(
+        db: AsyncSession,
+        rows: List[Any],
+        chunk_size: Optional[int] = None
+) -> dict:
+    """
+    Массовая загрузка броней (миграция из channel manager).
+    Строки валидируются BookingCreateSchema, доступность проверяется в памяти по снимку
+    accommodation_occupancy, загруженному одним запросом, вставка - пачками по chunk_size
+    строк в отдельной транзакции. Пачка записывается, как только набрана, поэтому следующие
+    строки проверяются уже с учетом того, записалась ли она. Цена берется из строки как есть.
+    """
+    chunk_size = chunk_size or BULK_IMPORT_CHUNK_SIZE
+    results = [None] * len(rows)
+
+    valid = []
+    for index, row in enumerate(rows):
+        if isinstance(row, InvalidRow):
+            results[index] = _rejected(index, row.error)
+            continue
+        try:
+            booking = BookingCreateSchema.parse_obj(row)
+        except ValidationError as e:
+            results[index] = _rejected(index, e.errors())
+            continue
+        if booking.check_in_date > booking.check_out_date:
+            results[index] = _rejected(index, "Дата выезда должна быть не раньше даты заезда")
+            continue
+        valid.append((index, booking))
+
+    if valid:
+        result = await db.execute(
+            select(Accommodation.id, Accommodation.type, Accommodation.count)
+            .where(Accommodation.id.in_({booking.accommodation_id for _, booking in valid}))
+        )
+        accommodations = {accommodation_id: (type_, count) for accommodation_id, type_, count in result}
+
+        start = min(booking.check_in_date for _, booking in valid)
+        end = max(max(booking.check_out_date, booking.check_in_date + timedelta(days=1)) for _, booking in valid)
+        occupancy = await load_occupancy(db, list(accommodations), start, end)
+
+        chunk = []
+        for index, booking in valid:
+            if booking.accommodation_id not in accommodations:
+                results[index] = _rejected(index, "Размещение не найдено")
+                continue
+
+            accommodation_type, count = accommodations[booking.accommodation_id]
+            first = (booking.check_in_date - start).days
+            if accommodation_type == AccommodationType.gazebo:
+                if booking.check_in_date != booking.check_out_date:
+                    results[index] = _rejected(index, "Для беседки даты заезда и выезда должны совпадать")
+                    continue
+                last = first + 1
+            else:
+                last = (booking.check_out_date - start).days
+
+            days = occupancy[booking.accommodation_id][first:last]
+            if len(days) and days.max() >= count:
+                results[index] = _rejected(index, "Уже забронировано")
+                continue
+
+            days += 1
+            chunk.append((index, booking, accommodation_type, first, last))
+            if len(chunk) == chunk_size:
+                await _commit_chunk(db, chunk, start, occupancy, results)
+                chunk = []
+
+        if chunk:
+            await _commit_chunk(db, chunk, start, occupancy, results)
+
+    accepted_count = sum(1 for result in results if result["status"] == "accepted")
+    return {"accepted": accepted_count, "rejected": len(results) - accepted_count, "results": results}
+
+
+class ChunkRejected(Exception):
+    """Пачка не записана, все ее строки отклоняются"""
+
+
+async def _commit_chunk(db: AsyncSession, chunk: list, start, occupancy: dict, results: list) -> None:
+    """
+    Записывает пачку и заполняет ее результаты. Если пачка отклонена, ее единицы
+    возвращаются в снимок занятости: строки следующих пачек не должны упираться в брони,
+    которых в БД нет.
+    """
+    try:
+        booking_ids = await _insert_chunk(db, chunk, start)
+    except ChunkRejected as e:
+        for index, booking, _, first, last in chunk:
+            occupancy[booking.accommodation_id][first:last] -= 1
+            results[index] = _rejected(index, str(e))
+        return
+
+    for (index, booking, accommodation_type, _, _), booking_id in zip(chunk, booking_ids):
+        results[index] = {"row": index, "status": "accepted", "id": booking_id}
+        on_booking_committed(
+            booking.accommodation_id, accommodation_type, booking.check_in_date, booking.check_out_date
+        )
+
+
+async def _insert_chunk(db: AsyncSession, chunk: list, start) -> List[int]:
+    """
+    Вставляет пачку броней (executemany) и увеличивает accommodation_occupancy в одной транзакции.
+    Возвращает id броней в порядке строк пачки.
+    """
+    booked_units = Counter()
+    for _, booking, _, first, last in chunk:
+        for offset in range(first, last):
+            booked_units[(booking.accommodation_id, start + timedelta(days=offset))] += 1
+
+    try:
+        result = await db.execute(
+            insert(Booking).returning(Booking.id, sort_by_parameter_order=True),
+            [booking.dict(exclude={"quote_token"}) for _, booking, *_ in chunk]
+        )
+        booking_ids = result.scalars().all()
+
+        if booked_units:
+            await _apply_booked_units(db, booked_units)
+
+        await db.commit()
+    except ChunkRejected:
+        await db.rollback()
+        raise
+    except Exception:
+        await db.rollback()
+        raise ChunkRejected("Ошибка базы данных")
+
+    return booking_ids
+
+
+async def _apply_booked_units(db: AsyncSession, booked_units: Counter) -> None:
+    """
+    Прибавляет занятые единицы в accommodation_occupancy. Если где-то занято больше единиц,
+    чем есть (параллельная бронь после снятия снимка), пачка отклоняется.
+    """
+    upsert = dialect_insert(db, AccommodationOccupancy)
+    await db.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[AccommodationOccupancy.accommodation_id, AccommodationOccupancy.date],
+            set_={"booked_units": AccommodationOccupancy.booked_units + upsert.excluded.booked_units}
+        ),
+        [
+            {"accommodation_id": accommodation_id, "date": day, "booked_units": units}
+            for (accommodation_id, day), units in booked_units.items()
+        ]
+    )
+
+    overbooked = await db.scalar(
+        select(func.count())
+        .select_from(AccommodationOccupancy)
+        .join(Accommodation, Accommodation.id == AccommodationOccupancy.accommodation_id)
+        .where(
+            AccommodationOccupancy.accommodation_id.in_({key[0] for key in booked_units}),
+            AccommodationOccupancy.date >= min(key[1] for key in booked_units),
+            AccommodationOccupancy.date <= max(key[1] for key in booked_units),
+            AccommodationOccupancy.booked_units > Accommodation.count
+        )
+    )
+    if overbooked:
+        raise ChunkRejected("Конфликт с параллельным бронированием, повторите загрузку строки")
@@ -1,59 +1,317 @@
 from calendar import weekday
 from datetime import date, datetime, timedelta
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import and_, or_, func, update
 
+from app.core.config import AVAILABILITY_ENGINE
+from app.db.expressions import selective
 from app.models.accommodation import Accommodation, AccommodationPrice
-from app.models.booking import Booking
+from app.models.booking import AccommodationOccupancy, Booking
+from app.services.catalog_cache import catalog_cache
+from app.services.occupancy_matrix import occupancy_matrix
+from app.services.price_calendar import from_cents, get_price_calendar
 from app.utils.enums import AccommodationType, Weekday
+from app.utils.helpers import months_between
 
 
-def check_accommodation_availability(
-        db: Session,
-        accommodation_id: int,
+def occupied_dates(
+        accommodation_type: AccommodationType,
+        check_in_date: date,
+        check_out_date: date
+) -> List[date]:
+    """
+    Дни, которые занимает бронь в учете занятости.
+    Для gazebo - только день заезда, для номеров/домов - каждая ночь [заезд, выезд).
+    """
+    if accommodation_type == AccommodationType.gazebo:
+        return [check_in_date]
+
+    nights = (check_out_date - check_in_date).days
+    return [check_in_date + timedelta(days=i) for i in range(nights)]
+
+
+def bookings_on_date(target_date: date):
+    """
+    Условие "бронь занимает target_date": ночь target_date внутри [заезд, выезд)
+    или однодневная бронь (gazebo) ровно на этот день.
+    Записано как один диапазон по check_out_date, чтобы работал индекс (check_out_date, check_in_date).
+    """
+    return and_(
+        selective(Booking.check_out_date >= target_date),
+        Booking.check_in_date <= target_date,
+        or_(Booking.check_out_date > target_date, Booking.check_in_date == target_date)
+    )
+
+
+def dialect_insert(db: AsyncSession, table):
+    """INSERT текущей СУБД - с поддержкой ON CONFLICT"""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(table)
+
+
+async def reserve_occupancy(
+        db: AsyncSession,
+        accommodation: Accommodation,
         check_in_date: date,
         check_out_date: date
 ) -> bool:
     """
-    Проверяет доступность конкретного размещения на даты.
-    Для gazebo (check_in_date == check_out_date) проверяем только конкретный день.
+    Занимает одну единицу размещения на все дни брони - либо на все, либо ни на один.
+    Счетчик увеличивается условным UPDATE (booked_units < count), поэтому параллельные
+    запросы не могут превысить количество единиц. Если вернулось False, транзакцию нужно откатить.
+    Вызывается в той же транзакции, что и создание брони.
     """
-    accommodation = db.query(Accommodation).get(accommodation_id)
+    dates = occupied_dates(accommodation.type, check_in_date, check_out_date)
+    if not dates:
+        return True
 
-    if not accommodation:
-        return False
+    # Строки учета должны существовать, чтобы их можно было обновить условно
+    await db.execute(
+        dialect_insert(db, AccommodationOccupancy).on_conflict_do_nothing(),
+        [{"accommodation_id": accommodation.id, "date": day, "booked_units": 0} for day in dates]
+    )
 
-    # Особый случай для gazebo (беседки) - бронирование на один день
-    if accommodation.type == AccommodationType.gazebo:
-        if check_in_date != check_out_date:
-            return False  # Для gazebo даты должны совпадать
+    result = await db.execute(
+        update(AccommodationOccupancy)
+        .where(
+            AccommodationOccupancy.accommodation_id == accommodation.id,
+            AccommodationOccupancy.date >= dates[0],
+            AccommodationOccupancy.date <= dates[-1],
+            AccommodationOccupancy.booked_units < accommodation.count
+        )
+        .values(booked_units=AccommodationOccupancy.booked_units + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+    return result.rowcount == len(dates)
+
+
+async def load_occupancy(
+        db: AsyncSession,
+        accommodation_ids: List[int],
+        start: date,
+        end: date
+) -> Dict[int, np.ndarray]:
+    """
+    Снимок занятости по дням [start, end) для каждого размещения - одним запросом к accommodation_occupancy.
+    Индекс массива - смещение дня от start.
+    """
+    days = max(0, (end - start).days)
+    occupancy = {accommodation_id: np.zeros(days, dtype=np.int32) for accommodation_id in accommodation_ids}
+    if not occupancy or not days:
+        return occupancy
+
+    result = await db.execute(
+        select(AccommodationOccupancy.accommodation_id, AccommodationOccupancy.date, AccommodationOccupancy.booked_units)
+        .where(
+            AccommodationOccupancy.accommodation_id.in_(list(occupancy)),
+            AccommodationOccupancy.date >= start,
+            AccommodationOccupancy.date < end
+        )
+    )
+    for accommodation_id, day, booked_units in result:
+        occupancy[accommodation_id][(day - start).days] = booked_units
+
+    return occupancy
+
+
+async def get_free_units(
+        db: AsyncSession,
+        accommodations: List[Accommodation],
+        check_in_date: date,
+        check_out_date: date
+) -> Dict[int, int]:
+    """
+    Возвращает количество свободных единиц на весь период для каждого размещения.
+    Занятость всех кандидатов считается одним агрегирующим запросом к accommodation_occupancy:
+    - для gazebo берется только день заезда (и даты заезда/выезда должны совпадать)
+    - для номеров/домов - максимум занятости по ночам [заезд, выезд)
+    """
+    free_units = {}
+    gazebo_ids = []
+    other_ids = []
+
+    for accommodation in accommodations:
+        if accommodation.type == AccommodationType.gazebo:
+            if check_in_date != check_out_date:
+                free_units[accommodation.id] = 0  # Для gazebo даты должны совпадать
+                continue
+            gazebo_ids.append(accommodation.id)
+        elif check_in_date < check_out_date:
+            other_ids.append(accommodation.id)
+
+        free_units[accommodation.id] = accommodation.count
+
+    if not gazebo_ids and not other_ids:
+        return free_units
+
+    if AVAILABILITY_ENGINE == "matrix" and occupancy_matrix.covers(check_in_date, check_out_date):
+        booked_units = occupancy_matrix.booked_units(gazebo_ids, other_ids, check_in_date, check_out_date)
+    else:
+        booked_units = await _load_booked_units(db, gazebo_ids, other_ids, check_in_date, check_out_date)
+
+    for accommodation_id, units in booked_units.items():
+        free_units[accommodation_id] = max(0, free_units[accommodation_id] - units)
+
+    return free_units
+
+
+async def _load_booked_units(
+        db: AsyncSession,
+        gazebo_ids: List[int],
+        other_ids: List[int],
+        check_in_date: date,
+        check_out_date: date
+) -> Dict[int, int]:
+    """Максимальная занятость за период по accommodation_occupancy - один запрос на всех кандидатов"""
+    conditions = []
+    if gazebo_ids:
+        conditions.append(and_(
+            AccommodationOccupancy.accommodation_id.in_(gazebo_ids),
+            AccommodationOccupancy.date == check_in_date
+        ))
+    if other_ids:
+        conditions.append(and_(
+            AccommodationOccupancy.accommodation_id.in_(other_ids),
+            AccommodationOccupancy.date >= check_in_date,
+            AccommodationOccupancy.date < check_out_date
+        ))
+
+    result = await db.execute(
+        select(AccommodationOccupancy.accommodation_id, func.max(AccommodationOccupancy.booked_units))
+        .where(or_(*conditions))
+        .group_by(AccommodationOccupancy.accommodation_id)
+    )
+    return dict(result.all())
+
+
+def flexible_candidates(
+        window_start: date,
+        window_end: date,
+        nights: int,
+        check_in_weekdays: Optional[List[int]] = None
+) -> List[Tuple[date, date]]:
+    """
+    Варианты (заезд, выезд) на nights ночей, целиком попадающие в окно [window_start, window_end].
+    check_in_weekdays ограничивает дни недели заезда (0 - понедельник), например [4] - "любые выходные".
+    """
+    candidates = []
+    check_in = window_start
+    while check_in + timedelta(days=nights) <= window_end:
+        if not check_in_weekdays or check_in.weekday() in check_in_weekdays:
+            candidates.append((check_in, check_in + timedelta(days=nights)))
+        check_in += timedelta(days=1)
+    return candidates
+
+
+async def find_flexible(
+        db: AsyncSession,
+        accommodations: List[Accommodation],
+        candidates: List[Tuple[date, date]],
+        guests: int
+) -> List[dict]:
+    """
+    Доступность и цена каждого варианта дат для каждого размещения за один проход.
+    Занятость всего окна загружается одним запросом (или берется из матрицы в памяти),
+    максимум занятости по каждому варианту - скользящим окном numpy,
+    стоимость - разностью накопленных сумм цен по ночам.
+    Правила те же, что у get_free_units и calculate_accommodation_price.
+    """
+    if not accommodations or not candidates:
+        return []
 
-        # Считаем бронирования на этот день
-        bookings_count = db.query(Booking).filter(
-            Booking.accommodation_id == accommodation_id,
-            Booking.check_in_date == check_in_date
-        ).count()
+    start = min(check_in for check_in, _ in candidates)
+    end = max(max(check_out, check_in + timedelta(days=1)) for check_in, check_out in candidates)
+    ids = [accommodation.id for accommodation in accommodations]
 
-        return bookings_count < accommodation.count
+    if AVAILABILITY_ENGINE == "matrix" and occupancy_matrix.covers(start, end - timedelta(days=1)):
+        occupancy = occupancy_matrix.occupancy(ids, start, end)
+    else:
+        occupancy = await load_occupancy(db, ids, start, end)
 
+    offsets = np.array([(check_in - start).days for check_in, _ in candidates])
+    nights = np.array([(check_out - check_in).days for check_in, check_out in candidates])
+
+    results = []
+    for accommodation in accommodations:
+        is_gazebo = accommodation.type == AccommodationType.gazebo
+        # Сколько дней учета занимает каждый вариант (для gazebo - один день заезда)
+        days = np.ones_like(nights) if is_gazebo else nights
+
+        booked = np.zeros(len(candidates), dtype=np.int32)
+        for length in np.unique(days[days > 0]).tolist():
+            mask = days == length
+            booked[mask] = sliding_window_view(occupancy[accommodation.id], length).max(axis=1)[offsets[mask]]
+
+        free_units = np.maximum(accommodation.count - booked, 0)
+        if is_gazebo:
+            free_units[nights != 0] = 0  # Для gazebo даты должны совпадать
+        if not free_units.any():
+            continue
+
+        extra_beds = 0 if is_gazebo else max(0, guests - accommodation.capacity)
+        nightly = get_price_calendar(accommodation).nightly(start, (end - start).days, extra_beds)
+        cumulative = np.concatenate(([0], np.cumsum(nightly)))
+        totals = cumulative[offsets + days] - cumulative[offsets]
+
+        results.append({
+            "accommodation": accommodation,
+            "requires_extra_bed": guests > accommodation.capacity,
+            "options": [
+                {
+                    "check_in_date": candidates[i][0],
+                    "check_out_date": candidates[i][1],
+                    "nights": int(nights[i]),
+                    "free_units": int(free_units[i]),
+                    "total_price": from_cents(totals[i]),
+                }
+                for i in np.flatnonzero(free_units > 0).tolist()
+            ],
+        })
+
+    return results
+
+
+def on_booking_committed(
+        accommodation_id: int,
+        accommodation_type: AccommodationType,
+        check_in_date: date,
+        check_out_date: date
+) -> None:
+    """Обновляет занятость в памяти и сбрасывает календарь затронутых месяцев после коммита брони"""
+    catalog_cache.discard("calendar", [
+        (accommodation_id, month)
+        for month in months_between(check_in_date, max(check_in_date, check_out_date))
+    ])
+    if AVAILABILITY_ENGINE == "matrix":
+        occupancy_matrix.add_booking(accommodation_id, accommodation_type, check_in_date, check_out_date)
 
-    # Для номеров/домов проверяем по дням
-    current_date = check_in_date
-    while current_date < check_out_date:
-        # Считаем бронирования, которые затрагивают current_date
-        bookings_count = db.query(Booking).filter(
-            Booking.accommodation_id == accommodation_id,
-            Booking.check_in_date <= current_date,
-            Booking.check_out_date > current_date
-        ).count()
 
-        if bookings_count >= accommodation.count:
-            return False
+async def check_accommodation_availability(
+        db: AsyncSession,
+        accommodation_id: int,
+        check_in_date: date,
+        check_out_date: date
+) -> bool:
+    """
+    Проверяет доступность конкретного размещения на даты.
+    Для gazebo (check_in_date == check_out_date) проверяем только конкретный день.
+    """
+    accommodation = await db.get(Accommodation, accommodation_id)
 
-        current_date += timedelta(days=1)
+    if not accommodation:
+        return False
 
-    return True
+    free_units = await get_free_units(db, [accommodation], check_in_date, check_out_date)
+    return free_units[accommodation_id] > 0
 
 
 def calculate_accommodation_price(
@@ -63,65 +321,39 @@ def calculate_accommodation_price(
         guests: int
 ) -> dict:
     """
-    Рассчитывает стоимость проживания.
+    Рассчитывает стоимость проживания по календарю цен размещения.
     Для gazebo считает как 1 день независимо от времени.
     """
+    calendar = get_price_calendar(accommodation)
 
-    extra_beds = max(0, guests - accommodation.capacity)
-
-    # Особый расчёт для gazebo (беседки)
+    # Для gazebo всегда 1 день и без доп. мест
     if accommodation.type == AccommodationType.gazebo:
-        # Для gazebo всегда 1 день
-        price = _find_price_for_date(accommodation, 0, check_in)
-
-        return {
-            "total": price,
-            "nights": 0,
-            "details": [{
-                "date": check_in.strftime("%Y-%m-%d"),
-                "type": "weekend" if check_in.weekday() >= 5 else "weekday",
-                "price_on_day": price,
-                "extra_beds": 0,
-            }]
-        }
-
-    # Стандартный расчёт для номеров/домов
-    total = 0
-    details = []
-    current_date = check_in
-    nights = 0
-
+        days, nights, extra_beds = 1, 0, 0
+    else:
+        nights = max(0, (check_out - check_in).days)
+        days, extra_beds = nights, max(0, guests - accommodation.capacity)
 
-    while current_date < check_out:
+    prices = calendar.nightly(check_in, days, extra_beds)
+    dates = np.arange(np.datetime64(check_in), np.datetime64(check_in) + days)
+    is_weekend = (np.arange(days) + check_in.weekday()) % 7 >= 5
 
-        price_for_day = _find_price_for_date(accommodation, extra_beds, current_date)
-        details.append({
-            "date": current_date.strftime("%Y-%m-%d"),
-            "type": "weekend" if current_date.weekday() >= 5 else "weekday",
-            "price_on_day": price_for_day,
+    details = [
+        {
+            "date": day,
+            "type": "weekend" if weekend else "weekday",
+            "price_on_day": from_cents(price),
             "extra_beds": extra_beds,
-        })
-
-        total += price_for_day
-        nights += 1
-        current_date += timedelta(days=1)
+        }
+        for day, weekend, price in zip(np.datetime_as_string(dates).tolist(), is_weekend.tolist(), prices.tolist())
+    ]
 
-    return {"total": total, "nights": nights, "details": details}
+    return {"total": from_cents(prices.sum()), "nights": nights, "details": details}
 
 
-def _find_price_for_date(accommodation: Accommodation,  extra_beds:int, date: date) -> AccommodationPrice:
+def _find_price_for_date(accommodation: Accommodation,  extra_beds:int, date: date) -> Decimal:
     """
     Вспомогальтельная функция, возвращает цену для даты с учетом типа размещения:
     - Для gazebo: цена на текущую дату (date)
     - Для номеров/домов: цена на следующий день (date + 1 день, т.к. заезд в пятницу по цене субботы)
     """
-    # определяем целевую дату для расчета цены
-    target_date = date if accommodation.type == AccommodationType.gazebo else date + timedelta(days=1)
-    is_weekend = target_date.weekday() >= 5  # 5-6 = суббота-воскресенье
-
-    # возвращаем сумму одного дня
-    for price, extra_bed_price in accommodation.prices:
-        if price.weekday_type == (Weekday.weekend if is_weekend else Weekday.weekday):
-            return (price.price + (price.extra_bed_price * extra_beds))
-
-    raise ValueError(f"No price found for {accommodation.name} on {date}")
\ No newline at end of file
+    return get_price_calendar(accommodation).quote(date, 1, extra_beds)
@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import time
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+import brotli
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import CATALOG_CACHE_MAX_AGE
+from app.core.serialization import dumps
+
+
+class CatalogCache:
+    """
+    Кэш сериализованного каталога в памяти процесса.
+    Ключ - (раздел, id), где раздел "accommodations" или "services", id=None для списка
+    (для списка хранится CatalogSnapshot, для отдельного объекта - готовый словарь).
+    Раздел "calendar" - календарь занятости с ключом (id размещения, "YYYY-MM").
+    Записи живут не дольше max_age секунд и сбрасываются по разделу при создании объектов.
+    Сброс действует только в своем процессе: в остальных каталог может отставать до max_age.
+    Заполнять кэш нужно из основной БД (get_async_db) - отстающая реплика вернула бы в него старые данные.
+    """
+
+    def __init__(self, max_age: float = CATALOG_CACHE_MAX_AGE):
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, Hashable], Tuple[float, Any]] = {}
+
+    def get(self, section: str, key: Hashable = None) -> Optional[Any]:
+        entry = self._entries.get((section, key))
+        if entry is None or time.monotonic() - entry[0] > self.max_age:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[1]
+
+    def set(self, section: str, key: Hashable, payload: Any) -> Any:
+        self._entries[(section, key)] = (time.monotonic(), payload)
+        return payload
+
+    def discard(self, section: str, keys: Iterable[Hashable]) -> None:
+        """Сбрасывает отдельные записи раздела"""
+        for key in keys:
+            self._entries.pop((section, key), None)
+
+    def invalidate(self, section: Optional[str] = None) -> None:
+        """Сбрасывает раздел каталога (или весь кэш, если раздел не указан)"""
+        if section is None:
+            self._entries.clear()
+            return
+
+        for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == section]:
+            self._entries.pop(entry_key, None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class CatalogSnapshot:
+    """
+    Неизменяемый снимок списка каталога: тело сериализуется, хэшируется для ETag
+    и сжимается (gzip/brotli) один раз при построении.
+    """
+
+    __slots__ = ("body", "etag", "encoded")
+
+    def __init__(self, payload: Any):
+        self.body = dumps(payload)
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+        self.encoded = {
+            "br": brotli.compress(self.body),
+            "gzip": gzip.compress(self.body, compresslevel=9, mtime=0),
+        }
+
+    def response(self, request: Request) -> Response:
+        headers = {"ETag": self.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and self._etag_matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.encoded:
+                headers["Content-Encoding"] = encoding
+                return Response(self.encoded[encoding], media_type="application/json", headers=headers)
+
+        return Response(self.body, media_type="application/json", headers=headers)
+
+    def _etag_matches(self, if_none_match: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        # Для If-None-Match сравнение слабое: W/"..." совпадает с "..."
+        tags = (tag.strip() for tag in if_none_match.split(","))
+        return any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Кодировки из Accept-Encoding, кроме явно запрещенных через q=0"""
+    accepted = set()
+    for item in accept_encoding.split(","):
+        encoding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if encoding:
+            accepted.add(encoding.lower())
+    return accepted
+
+
+catalog_cache = CatalogCache()
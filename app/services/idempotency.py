@@ -0,0 +1,80 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Tuple
+
+from app.core.config import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_TTL
+
+
+class IdempotencyKeyReused(Exception):
+    """Тот же Idempotency-Key пришел с другим телом запроса"""
+
+
+class _Entry:
+    __slots__ = ("fingerprint", "result", "created_at")
+
+    def __init__(self, fingerprint: str, result: asyncio.Future):
+        self.fingerprint = fingerprint
+        self.result = result
+        self.created_at = time.monotonic()
+
+
+class IdempotencyStore:
+    """
+    Ответы на запросы с Idempotency-Key в памяти процесса (LRU с TTL).
+    Первый запрос выполняется, повторы получают сохраненный ответ, а параллельные
+    дубликаты ждут завершения первого запроса вместо повторного выполнения.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+
+    async def execute(
+            self,
+            key: str,
+            fingerprint: str,
+            handler: Callable[[], Awaitable[Tuple[int, Any]]]
+    ) -> Tuple[int, Any, bool]:
+        """
+        Возвращает (status_code, тело ответа, повтор ли это).
+        Если handler упал с исключением, ключ освобождается и исключение получают все ожидающие.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created_at > self.ttl:
+            del self._entries[key]
+            entry = None
+
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                raise IdempotencyKeyReused(key)
+            self._entries.move_to_end(key)
+            status_code, content = await asyncio.shield(entry.result)
+            return status_code, content, True
+
+        entry = _Entry(fingerprint, asyncio.get_running_loop().create_future())
+        self._entries[key] = entry
+        while len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+        try:
+            status_code, content = await handler()
+        except BaseException as e:
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+            if isinstance(e, Exception):
+                entry.result.set_exception(e)
+                entry.result.exception()  # Помечаем как полученное, если никто не ждал
+            else:
+                entry.result.cancel()
+            raise
+
+        entry.result.set_result((status_code, content))
+        return status_code, content, False
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+idempotency_store = IdempotencyStore()
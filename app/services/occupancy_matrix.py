@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import OCCUPANCY_HORIZON_DAYS
+from app.models.accommodation import Accommodation
+from app.models.booking import AccommodationOccupancy, Booking
+from app.utils.enums import AccommodationType
+
+
+class OccupancyMatrix:
+    """
+    Занятость всех размещений в памяти процесса.
+    Строка матрицы - размещение, столбец - день горизонта начиная с self.start,
+    значение - количество занятых единиц (int16).
+    """
+
+    def __init__(self, horizon_days: int = OCCUPANCY_HORIZON_DAYS):
+        self.horizon_days = horizon_days
+        self.start: Optional[date] = None
+        self.units = np.zeros((0, horizon_days), dtype=np.int16)
+        self.rows: Dict[int, int] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.start is not None
+
+    def covers(self, first_day: date, last_day: date) -> bool:
+        """Попадают ли дни [first_day, last_day] в загруженный горизонт"""
+        if not self.loaded:
+            return False
+        return first_day >= self.start and (last_day - self.start).days < self.horizon_days
+
+    async def load(self, db: AsyncSession, start: Optional[date] = None) -> None:
+        """Строит матрицу по таблице bookings на горизонт от start (по умолчанию - сегодня)"""
+        start = start or date.today()
+        end = start + timedelta(days=self.horizon_days)
+
+        result = await db.execute(
+            select(Booking.accommodation_id, Booking.check_in_date, Booking.check_out_date, Accommodation.type)
+            .join(Accommodation, Accommodation.id == Booking.accommodation_id)
+            .where(Booking.check_in_date < end, Booking.check_out_date >= start)
+        )
+
+        self.start = start
+        self.units = np.zeros((0, self.horizon_days), dtype=np.int16)
+        self.rows = {}
+        for accommodation_id, check_in_date, check_out_date, accommodation_type in result:
+            self.add_booking(accommodation_id, accommodation_type, check_in_date, check_out_date)
+
+    def add_booking(
+            self,
+            accommodation_id: int,
+            accommodation_type: AccommodationType,
+            check_in_date: date,
+            check_out_date: date
+    ) -> None:
+        """Учитывает закоммиченную бронь (та же схема дней, что и в accommodation_occupancy)"""
+        if not self.loaded:
+            return
+
+        if accommodation_type == AccommodationType.gazebo:
+            first, last = self._offset(check_in_date), self._offset(check_in_date) + 1
+        else:
+            first, last = self._offset(check_in_date), self._offset(check_out_date)
+
+        first, last = max(first, 0), min(last, self.horizon_days)
+        if first >= last:
+            return
+
+        row = self._row(accommodation_id)
+        self.units[row, first:last] += 1
+
+    def booked_units(
+            self,
+            gazebo_ids: List[int],
+            other_ids: List[int],
+            check_in_date: date,
+            check_out_date: date
+    ) -> Dict[int, int]:
+        """
+        Максимальная занятость за период для каждого размещения - срез матрицы и max по строкам.
+        Для gazebo берется день заезда, для номеров/домов - ночи [заезд, выезд).
+        """
+        booked = {}
+        first = self._offset(check_in_date)
+
+        for ids, last in ((gazebo_ids, first + 1), (other_ids, self._offset(check_out_date))):
+            known = [accommodation_id for accommodation_id in ids if accommodation_id in self.rows]
+            if not known:
+                continue
+            rows = [self.rows[accommodation_id] for accommodation_id in known]
+            booked.update(zip(known, self.units[rows, first:last].max(axis=1).tolist()))
+
+        return booked
+
+    def occupancy(self, accommodation_ids: List[int], start: date, end: date) -> Dict[int, np.ndarray]:
+        """Занятость по дням [start, end) для каждого размещения - как load_occupancy, но из памяти"""
+        first, last = self._offset(start), self._offset(end)
+        return {
+            accommodation_id: (
+                self.units[self.rows[accommodation_id], first:last].astype(np.int32)
+                if accommodation_id in self.rows else np.zeros(last - first, dtype=np.int32)
+            )
+            for accommodation_id in accommodation_ids
+        }
+
+    def _offset(self, day: date) -> int:
+        return (day - self.start).days
+
+    def _row(self, accommodation_id: int) -> int:
+        if accommodation_id not in self.rows:
+            self.rows[accommodation_id] = len(self.rows)
+            if len(self.rows) > self.units.shape[0]:
+                grow = max(16, self.units.shape[0])
+                self.units = np.vstack([self.units, np.zeros((grow, self.horizon_days), dtype=np.int16)])
+        return self.rows[accommodation_id]
+
+
+occupancy_matrix = OccupancyMatrix()
+
+
+async def verify_occupancy_matrix(db: AsyncSession, matrix: OccupancyMatrix = occupancy_matrix) -> List[tuple]:
+    """
+    Сверяет матрицу в памяти с accommodation_occupancy в пределах горизонта.
+    Возвращает расхождения в виде (accommodation_id, date, в матрице, в БД).
+    """
+    if not matrix.loaded:
+        return []
+
+    end = matrix.start + timedelta(days=matrix.horizon_days)
+    result = await db.execute(
+        select(AccommodationOccupancy).where(
+            AccommodationOccupancy.date >= matrix.start,
+            AccommodationOccupancy.date < end
+        )
+    )
+
+    expected = np.zeros_like(matrix.units)
+    mismatches = []
+    for row in result.scalars():
+        if row.accommodation_id in matrix.rows:
+            expected[matrix.rows[row.accommodation_id], (row.date - matrix.start).days] = row.booked_units
+        elif row.booked_units:
+            mismatches.append((row.accommodation_id, row.date, 0, row.booked_units))
+
+    for accommodation_id, index in matrix.rows.items():
+        for offset in np.flatnonzero(matrix.units[index] != expected[index]).tolist():
+            mismatches.append((
+                accommodation_id,
+                matrix.start + timedelta(days=offset),
+                int(matrix.units[index, offset]),
+                int(expected[index, offset]),
+            ))
+    return mismatches
@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.models.accommodation import Accommodation
+from app.utils.enums import AccommodationType, Weekday
+
+
+CENT = Decimal("0.01")
+NO_PRICE = -1
+
+
+def to_cents(value) -> int:
+    return int((Decimal(str(value or 0)) / CENT).to_integral_value())
+
+
+def from_cents(value: int) -> Decimal:
+    return (Decimal(int(value)) * CENT).quantize(CENT)
+
+
+class PriceCalendar:
+    """
+    Цены размещения по дню недели, в который начинается ночь (0 - понедельник), в копейках.
+    - Для gazebo цена берется по самому дню
+    - Для номеров/домов - по следующему дню (заезд в пятницу по цене субботы)
+    """
+
+    def __init__(self, accommodation: Accommodation):
+        self.name = accommodation.name
+        self.is_gazebo = accommodation.type == AccommodationType.gazebo
+
+        prices = {price.weekday_type: price for price in accommodation.prices}
+        weekday = prices.get(Weekday.weekday, prices.get(Weekday.anytime))
+        weekend = prices.get(Weekday.weekend, prices.get(Weekday.anytime))
+
+        shift = 0 if self.is_gazebo else 1
+        is_weekend = (np.arange(7) + shift) % 7 >= 5  # 5-6 = суббота-воскресенье
+
+        self.base = np.where(
+            is_weekend,
+            to_cents(weekend.price) if weekend else NO_PRICE,
+            to_cents(weekday.price) if weekday else NO_PRICE,
+        ).astype(np.int64)
+        self.extra_bed = np.where(
+            is_weekend,
+            to_cents(weekend.extra_bed_price) if weekend else NO_PRICE,
+            to_cents(weekday.extra_bed_price) if weekday else NO_PRICE,
+        ).astype(np.int64)
+
+    def nightly(self, first_day: date, days: int, extra_beds: int) -> np.ndarray:
+        """Цена каждой ночи (дня для gazebo) начиная с first_day, в копейках"""
+        weekdays = (np.arange(days) + first_day.weekday()) % 7
+        base = self.base[weekdays]
+        if (base == NO_PRICE).any():
+            raise ValueError(f"No price found for {self.name} on {first_day}")
+        return base + self.extra_bed[weekdays] * extra_beds
+
+    def daily(self, first_day: date, days: int) -> np.ndarray:
+        """Базовая цена каждой ночи (дня для gazebo) без доп. мест, NO_PRICE - если цена не задана"""
+        return self.base[(np.arange(days) + first_day.weekday()) % 7]
+
+    def quote(self, first_day: date, days: int, extra_beds: int) -> Decimal:
+        """Стоимость days ночей начиная с first_day"""
+        return from_cents(self.nightly(first_day, days, extra_beds).sum())
+
+
+_calendars: Dict[int, Tuple[tuple, PriceCalendar]] = {}
+
+
+def get_price_calendar(accommodation: Accommodation) -> PriceCalendar:
+    """Календарь строится один раз на размещение и перестраивается, если поменялись цены"""
+    fingerprint = (accommodation.type, accommodation.name) + tuple(
+        (price.weekday_type, price.price, price.extra_bed_price) for price in accommodation.prices
+    )
+
+    cached = _calendars.get(accommodation.id)
+    if cached is None or cached[0] != fingerprint:
+        cached = (fingerprint, PriceCalendar(accommodation))
+        _calendars[accommodation.id] = cached
+
+    return cached[1]
@@ -1 +1,33 @@
-pass
\ No newline at end of file
+import base64
+import binascii
+import json
+from datetime import date
+from typing import List, Optional
+
+
+def encode_cursor(booking_id: int) -> str:
+    """Непрозрачный курсор пагинации: ссылка на последнюю запись страницы"""
+    raw = json.dumps({"id": booking_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[int]:
+    """Возвращает id записи из курсора или None, если курсор испорчен"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        booking_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        return None
+
+    # bool - подкласс int, но {"id": true} курсором не является
+    return booking_id if isinstance(booking_id, int) and not isinstance(booking_id, bool) else None
+
+
+def months_between(first_day: date, last_day: date) -> List[str]:
+    """Месяцы в формате YYYY-MM, которые задевает период [first_day, last_day]"""
+    months = []
+    year, month = first_day.year, first_day.month
+    while (year, month) <= (last_day.year, last_day.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
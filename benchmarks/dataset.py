@@ -0,0 +1,172 @@
+"""
+Синтетический набор данных курорта для нагрузочных тестов.
+
+    python -m benchmarks.dataset --database-url sqlite+aiosqlite:////tmp/bench.db \
+        --accommodations 200 --bookings 50000 --years-back 2 --years-forward 1
+
+Таблицы создаются по моделям (база одноразовая), каталог загружается через
+app.management.load_catalog, брони и accommodation_occupancy - пачками в одной транзакции
+без превышения count размещений.
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.db.base import Base
+from app.management.load_catalog import load_catalog
+from app.models.accommodation import Accommodation
+from app.models.booking import AccommodationOccupancy, Booking
+from app.utils.enums import AccommodationType
+
+INSERT_CHUNK_SIZE = 5000
+
+
+def synthetic_catalog(accommodations: int, rng: random.Random) -> dict:
+    """Каталог из accommodations размещений (примерно каждое десятое - беседка) и пары услуг"""
+    items = []
+    for number in range(1, accommodations + 1):
+        is_gazebo = number % 10 == 0
+        weekday_price = rng.randrange(20, 300) * 100
+        items.append({
+            "name": f"{'Беседка' if is_gazebo else 'Дом'} {number}",
+            "type": "gazebo" if is_gazebo else rng.choice(["guest_house", "hotel_room"]),
+            "short_description": f"Синтетическое размещение {number}",
+            "capacity": rng.choice([2, 4, 6, 8, 20] if is_gazebo else [1, 2, 4, 6, 8]),
+            "count": rng.randint(1, 10),
+            "extra_beds_available": 0 if is_gazebo else rng.choice([0, 0, 1, 2]),
+            "prices": [
+                {"weekday_type": "weekday", "price": weekday_price, "extra_bed_price": 1000},
+                {"weekday_type": "weekend", "price": weekday_price * 1.3, "extra_bed_price": 1500},
+            ],
+        })
+
+    services = [
+        {
+            "name": "Баня", "is_free": False, "is_agreement_required": True,
+            "prices": [{"weekday_type": "anyday", "name": "2 часа", "duration_hours": 2, "price": 3000}],
+        },
+        {"name": "Парковка", "is_free": True, "is_agreement_required": False, "prices": []},
+    ]
+    return {"accommodations": items, "services": services}
+
+
+async def generate_dataset(
+        db: AsyncSession,
+        accommodations: int = 100,
+        bookings: int = 10000,
+        start: Optional[date] = None,
+        days: int = 3 * 365,
+        seed: int = 42
+) -> dict:
+    """
+    Заполняет базу каталогом и бронями на горизонте [start, start + days).
+    Брони, не помещающиеся по count, пропускаются - поэтому их может оказаться меньше bookings.
+    """
+    rng = random.Random(seed)
+    start = start or date.today() - timedelta(days=days // 2)
+    await load_catalog(db, synthetic_catalog(accommodations, rng))
+
+    result = await db.execute(select(Accommodation.id, Accommodation.type, Accommodation.count, Accommodation.capacity))
+    catalog = result.all()
+    occupancy = {accommodation_id: np.zeros(days, dtype=np.int32) for accommodation_id, *_ in catalog}
+
+    rows = []
+    for _ in range(bookings):
+        accommodation_id, accommodation_type, count, capacity = rng.choice(catalog)
+        first = rng.randrange(days - 8)
+        if accommodation_type == AccommodationType.gazebo:
+            nights, last = 0, first + 1
+        else:
+            nights = rng.choice([1, 1, 2, 2, 3, 4, 7])
+            last = first + nights
+
+        if occupancy[accommodation_id][first:last].max() >= count:
+            continue
+        occupancy[accommodation_id][first:last] += 1
+
+        check_in = start + timedelta(days=first)
+        rows.append({
+            "accommodation_id": accommodation_id,
+            "check_in_date": check_in,
+            "check_out_date": check_in + timedelta(days=nights),
+            "guests": rng.randint(1, capacity),
+            "guest_name": f"Гость {len(rows) + 1}",
+            "guest_phone": f"+7999{rng.randrange(10 ** 7):07d}",
+            "guest_email": f"guest{len(rows) + 1}@example.com",
+            "total_price": rng.randrange(20, 2000) * 100,
+            "created_at": datetime.combine(check_in, datetime.min.time()) - timedelta(
+                days=rng.randint(1, 90), seconds=rng.randrange(86400)
+            ),
+        })
+
+    occupancy_rows = [
+        {"accommodation_id": accommodation_id, "date": start + timedelta(days=offset), "booked_units": units}
+        for accommodation_id, units_by_day in occupancy.items()
+        for offset, units in zip(np.flatnonzero(units_by_day).tolist(), units_by_day[units_by_day > 0].tolist())
+    ]
+
+    await db.execute(delete(AccommodationOccupancy))
+    await db.execute(delete(Booking))
+    for table, table_rows in ((Booking, rows), (AccommodationOccupancy, occupancy_rows)):
+        for chunk_start in range(0, len(table_rows), INSERT_CHUNK_SIZE):
+            await db.execute(insert(table), table_rows[chunk_start:chunk_start + INSERT_CHUNK_SIZE])
+    await db.commit()
+
+    return {
+        "accommodations": len(catalog),
+        "bookings": len(rows),
+        "occupancy_rows": len(occupancy_rows),
+        "start": start.isoformat(),
+        "days": days,
+    }
+
+
+async def main(args) -> dict:
+    # Конфиг читает окружение при импорте, а load.py выставляет DATABASE_URL перед вызовом main
+    from app.core.config import DatabaseSettings
+    from app.db.engine import create_async_engine_from_settings
+
+    engine = create_async_engine_from_settings(DatabaseSettings(url=args.database_url))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    started = time.perf_counter()
+    try:
+        async with session_factory() as db:
+            stats = await generate_dataset(
+                db,
+                accommodations=args.accommodations,
+                bookings=args.bookings,
+                start=date.today() - timedelta(days=365 * args.years_back),
+                days=365 * (args.years_back + args.years_forward),
+                seed=args.seed,
+            )
+    finally:
+        await engine.dispose()
+
+    stats["seconds"] = round(time.perf_counter() - started, 2)
+    return stats
+
+
+def add_dataset_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--accommodations", type=int, default=100, help="Сколько размещений создать")
+    parser.add_argument("--bookings", type=int, default=10000, help="Сколько броней попытаться создать")
+    parser.add_argument("--years-back", type=int, default=2, help="Лет истории до сегодняшнего дня")
+    parser.add_argument("--years-forward", type=int, default=1, help="Лет будущих броней")
+    parser.add_argument("--seed", type=int, default=42)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных курорта")
+    parser.add_argument("--database-url", required=True, help="URL одноразовой базы, например sqlite+aiosqlite:////tmp/bench.db")
+    add_dataset_arguments(parser)
+    print(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,234 @@
+"""
+Нагрузочный прогон API на синтетических данных.
+
+    python -m benchmarks.load --database-url sqlite+aiosqlite:////tmp/bench.db --seed-data \
+        --concurrency 20 --requests 500 --output benchmarks/results/sqlite.json
+
+По умолчанию приложение запускается в этом же процессе (httpx поверх ASGI) - тогда
+считаются и запросы к БД. С --base-url нагружается уже запущенный сервер (без счетчика запросов).
+Сценарии выполняются по очереди, каждый - requests запросов с concurrency параллельными клиентами.
+Результат (p50/p95/p99, RPS, коды ответов, запросов к БД на запрос) печатается и сохраняется в JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+SCENARIOS = ("catalog", "find", "bookings_list", "create_booking")
+
+
+class Scenario:
+    """Один сценарий нагрузки: request(client, rng) делает один запрос и возвращает ответ"""
+
+    def __init__(self, name: str, request: Callable[[httpx.AsyncClient, random.Random], Awaitable[httpx.Response]]):
+        self.name = name
+        self.request = request
+
+
+def _future_dates(rng: random.Random, nights: int) -> tuple:
+    check_in = date.today() + timedelta(days=rng.randrange(1, 300))
+    return check_in, check_in + timedelta(days=nights)
+
+
+async def _catalog(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    return await client.get(rng.choice(["/accommodations/", "/services/"]))
+
+
+async def _find(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    check_in, check_out = _future_dates(rng, rng.choice([1, 2, 3, 7]))
+    return await client.get("/accommodations/find", params={
+        "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": rng.randint(1, 6)
+    })
+
+
+async def _bookings_list(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    params = {"limit": 50}
+    if rng.random() < 0.3:
+        params["target_date"] = (date.today() + timedelta(days=rng.randrange(-300, 300))).isoformat()
+    return await client.get("/bookings/", params=params)
+
+
+async def _create_booking(client: httpx.AsyncClient, rng: random.Random) -> httpx.Response:
+    """Поиск и бронь первого найденного варианта по quote_token, как это делает фронт"""
+    check_in, check_out = _future_dates(rng, rng.choice([1, 2, 3]))
+    found = await client.get("/accommodations/find", params={
+        "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 2
+    })
+    if found.status_code != 200 or not found.json():
+        return found
+
+    item = rng.choice(found.json())
+    return await client.post("/bookings/", json={
+        "accommodation_id": item["accommodation"]["id"],
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "guests": 2,
+        "guest_name": "Нагрузочный тест",
+        "guest_phone": "+79990000000",
+        "guest_email": "load@example.com",
+        "total_price": item["total_price"],
+        "quote_token": item["quote_token"],
+    })
+
+
+SCENARIO_REQUESTS = {
+    "catalog": _catalog,
+    "find": _find,
+    "bookings_list": _bookings_list,
+    "create_booking": _create_booking,
+}
+
+
+class QueryCounter:
+    """Счетчик SQL-запросов движков приложения (только при запуске в этом же процессе)"""
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in set(engines):
+            event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+def summarize(name: str, latencies: List[float], statuses: Counter, elapsed: float, queries: Optional[int]) -> dict:
+    """Сводка сценария: перцентили задержки в миллисекундах, пропускная способность, коды ответов"""
+    values = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]).tolist() if len(values) else (None, None, None)
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": sum(count for status, count in statuses.items() if status == "error" or int(status) >= 500),
+        "statuses": dict(sorted(statuses.items())),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": round(p50, 2) if p50 is not None else None,
+            "p95": round(p95, 2) if p95 is not None else None,
+            "p99": round(p99, 2) if p99 is not None else None,
+            "mean": round(float(values.mean()), 2) if len(values) else None,
+            "max": round(float(values.max()), 2) if len(values) else None,
+        },
+        "db_queries_per_request": round(queries / len(latencies), 2) if queries is not None and latencies else None,
+    }
+
+
+async def run_scenario(
+        client: httpx.AsyncClient,
+        scenario: Scenario,
+        requests: int,
+        concurrency: int,
+        seed: int,
+        counter: Optional[QueryCounter] = None
+) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int) -> None:
+        rng = random.Random(seed * 1000 + worker_id)
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, rng)
+                statuses[str(response.status_code)] += 1
+            except httpx.HTTPError:
+                statuses["error"] += 1
+            latencies.append(time.perf_counter() - started)
+
+    queries_before = counter.count if counter else None
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    queries = counter.count - queries_before if counter else None
+
+    return summarize(scenario.name, latencies, statuses, elapsed, queries)
+
+
+async def main(args) -> dict:
+    results = {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "base_url": args.base_url,
+            "database_url": args.database_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "scenarios": args.scenarios,
+            "seed": args.seed,
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+    }
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+        counter = None
+    else:
+        # Приложение читает DATABASE_URL при импорте, поэтому импортируем его после настройки окружения
+        os.environ["DATABASE_URL"] = args.database_url
+
+        if args.seed_data:
+            from benchmarks import dataset
+            results["dataset"] = await dataset.main(args)
+
+        from app.db.session import async_engine, read_async_engine
+        from app.main import app
+
+        async_engine.sync_engine.echo = False  # Лог каждого запроса исказит замеры
+        client = httpx.AsyncClient(app=app, base_url="http://benchmark", timeout=args.timeout)
+        counter = QueryCounter(async_engine, read_async_engine)
+
+    async with client:
+        results["scenarios"] = [
+            await run_scenario(
+                client, Scenario(name, SCENARIO_REQUESTS[name]), args.requests, args.concurrency, args.seed, counter
+            )
+            for name in args.scenarios
+        ]
+
+    return results
+
+
+def print_table(results: dict) -> None:
+    print(f"{'scenario':<16}{'requests':>10}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'queries':>10}  statuses")
+    for row in results["scenarios"]:
+        latency = row["latency_ms"]
+        print(
+            f"{row['scenario']:<16}{row['requests']:>10}{row['throughput_rps'] or '-':>10}"
+            f"{latency['p50'] or '-':>10}{latency['p95'] or '-':>10}{latency['p99'] or '-':>10}"
+            f"{row['db_queries_per_request'] if row['db_queries_per_request'] is not None else '-':>10}"
+            f"  {row['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    from benchmarks.dataset import add_dataset_arguments
+
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API курорта")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--database-url", help="База для запуска приложения в этом же процессе")
+    target.add_argument("--base-url", help="URL уже запущенного сервера, например http://localhost:8000")
+    parser.add_argument("--seed-data", action="store_true", help="Перед прогоном заполнить базу синтетическими данными")
+    parser.add_argument("--concurrency", type=int, default=10, help="Параллельных клиентов")
+    parser.add_argument("--requests", type=int, default=200, help="Запросов на сценарий")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", type=Path, help="Куда сохранить результаты в JSON")
+    add_dataset_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(main(args))
+    print_table(results)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
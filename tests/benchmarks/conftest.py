@@ -0,0 +1,153 @@
+"""
+Микробенчмарки горячих функций booking_service.
+
+    pytest -m benchmark tests/benchmarks                                  # прогон со сравнением с baseline.json
+    BENCHMARK_UPDATE_BASELINE=1 pytest -m benchmark tests/benchmarks      # записать новый baseline
+
+Каждый замер: прогрев, затем серия вызовов; в отчет идут min/median/mean/p95/stdev.
+Тест падает, если медиана хуже сохраненной в baseline.json больше чем в BENCHMARK_TOLERANCE раз (1.5).
+Baseline зависит от машины - обновляйте его на той же, где сравниваете.
+"""
+import asyncio
+import json
+import os
+import statistics
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import DatabaseSettings
+from app.db.base import Base
+from app.db.engine import create_async_engine_from_settings
+from benchmarks.dataset import generate_dataset
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+TOLERANCE = float(os.environ.get("BENCHMARK_TOLERANCE", 1.5))
+UPDATE_BASELINE = os.environ.get("BENCHMARK_UPDATE_BASELINE") == "1"
+
+# (размещений, броней) - размер каталога и плотность бронирования:
+# 20/2000 и 200/20000 - одна плотность (100 броней на размещение) при разном каталоге,
+# 20/20000 - тот же каталог, плотно забронированный (часть броней не помещается по count)
+DATASETS = [(20, 2000), (200, 20000), (20, 20000)]
+DATASET_START = date.today() - timedelta(days=365)
+DATASET_DAYS = 2 * 365
+
+_results: Dict[str, dict] = {}
+
+
+class Bench:
+    """Замер одной функции: прогрев, rounds вызовов, статистика и сравнение с baseline"""
+
+    def __init__(self, name: str, baseline: Optional[dict]):
+        self.name = name
+        self.baseline = baseline
+
+    def _report(self, timings: list) -> dict:
+        timings_us = sorted(value * 1e6 for value in timings)
+        stats = {
+            "rounds": len(timings_us),
+            "min_us": round(timings_us[0], 2),
+            "median_us": round(statistics.median(timings_us), 2),
+            "mean_us": round(statistics.fmean(timings_us), 2),
+            "p95_us": round(timings_us[int(len(timings_us) * 0.95) - 1], 2),
+            "stdev_us": round(statistics.stdev(timings_us), 2) if len(timings_us) > 1 else 0.0,
+        }
+        _results[self.name] = stats
+
+        if self.baseline and not UPDATE_BASELINE:
+            limit = self.baseline["median_us"] * TOLERANCE
+            if stats["median_us"] > limit:
+                pytest.fail(
+                    f"{self.name}: медиана {stats['median_us']} мкс хуже baseline "
+                    f"{self.baseline['median_us']} мкс больше чем в {TOLERANCE} раза"
+                )
+        return stats
+
+    def run(self, func: Callable, warmup: int = 50, rounds: int = 1000) -> dict:
+        for _ in range(warmup):
+            func()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return self._report(timings)
+
+    async def run_async(self, func: Callable[[], Awaitable], warmup: int = 20, rounds: int = 200) -> dict:
+        for _ in range(warmup):
+            await func()
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await func()
+            timings.append(time.perf_counter() - started)
+        return self._report(timings)
+
+
+@pytest.fixture(scope="session")
+def baseline() -> dict:
+    if BASELINE_PATH.exists():
+        return json.loads(BASELINE_PATH.read_text(encoding="utf-8"))
+    return {}
+
+
+@pytest.fixture
+def bench(request, baseline):
+    """Bench с именем текущего теста (вместе с параметрами)"""
+    name = request.node.name
+    return Bench(name, baseline.get(name))
+
+
+async def _seed(url: str, accommodations: int, bookings: int) -> None:
+    engine = create_async_engine_from_settings(DatabaseSettings(url=url))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        async with session_factory() as db:
+            await generate_dataset(db, accommodations, bookings, start=DATASET_START, days=DATASET_DAYS)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture(scope="session")
+def dataset_urls(tmp_path_factory) -> Dict[tuple, str]:
+    """Файловые SQLite-базы с синтетическими данными, по одной на размер из DATASETS"""
+    urls = {}
+    directory = tmp_path_factory.mktemp("benchmark_data")
+    for accommodations, bookings in DATASETS:
+        url = f"sqlite+aiosqlite:///{directory / f'resort_{accommodations}_{bookings}.db'}"
+        asyncio.run(_seed(url, accommodations, bookings))
+        urls[(accommodations, bookings)] = url
+    return urls
+
+
+@pytest.fixture
+async def session_factory(request, dataset_urls):
+    """Фабрика сессий к базе набора данных из параметра dataset теста"""
+    engine = create_async_engine_from_settings(DatabaseSettings(url=dataset_urls[request.getfixturevalue("dataset")]))
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"{'name':<70}{'median us':>12}{'p95 us':>12}{'stdev us':>12}{'baseline':>12}")
+    baseline = json.loads(BASELINE_PATH.read_text(encoding="utf-8")) if BASELINE_PATH.exists() else {}
+    for name, stats in sorted(_results.items()):
+        previous = baseline.get(name, {}).get("median_us", "-")
+        terminalreporter.write_line(
+            f"{name:<70}{stats['median_us']:>12}{stats['p95_us']:>12}{stats['stdev_us']:>12}{previous:>12}"
+        )
+
+    if UPDATE_BASELINE:
+        baseline.update(_results)
+        BASELINE_PATH.write_text(json.dumps(baseline, ensure_ascii=False, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        terminalreporter.write_line(f"baseline сохранен в {BASELINE_PATH}")
@@ -0,0 +1,72 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy.future import select
+
+from app.models.accommodation import Accommodation
+from app.services.booking_service import (_find_price_for_date, calculate_accommodation_price,
+                                          check_accommodation_availability)
+from app.utils.enums import AccommodationType
+from tests.benchmarks.conftest import DATASETS
+
+pytestmark = pytest.mark.benchmark
+
+NIGHTS = [1, 7, 30, 60]
+DATASET_IDS = [f"catalog{accommodations}-bookings{bookings}" for accommodations, bookings in DATASETS]
+
+
+async def _accommodations(session_factory, limit: int = 20) -> list:
+    """Размещения с ночевкой (не беседки) из набора данных"""
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Accommodation).where(Accommodation.type != AccommodationType.gazebo).order_by(Accommodation.id)
+        )
+        return result.scalars().all()[:limit]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("nights", NIGHTS)
+@pytest.mark.parametrize("dataset", DATASETS, ids=DATASET_IDS)
+async def test_check_accommodation_availability(bench, session_factory, dataset, nights):
+    """Каждый вызов - в новой сессии, как в запросе API"""
+    accommodations = await _accommodations(session_factory)
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=nights)
+    calls = iter(range(10 ** 9))
+
+    async def call():
+        accommodation = accommodations[next(calls) % len(accommodations)]
+        async with session_factory() as db:
+            await check_accommodation_availability(db, accommodation.id, check_in, check_out)
+
+    await bench.run_async(call)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("nights", NIGHTS)
+@pytest.mark.parametrize("dataset", DATASETS, ids=DATASET_IDS)
+async def test_calculate_accommodation_price(bench, session_factory, dataset, nights):
+    accommodations = await _accommodations(session_factory)
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=nights)
+    calls = iter(range(10 ** 9))
+
+    def call():
+        accommodation = accommodations[next(calls) % len(accommodations)]
+        calculate_accommodation_price(accommodation, check_in, check_out, accommodation.capacity + 1)
+
+    bench.run(call)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dataset", DATASETS, ids=DATASET_IDS)
+async def test_find_price_for_date(bench, session_factory, dataset):
+    accommodations = await _accommodations(session_factory)
+    day = date.today() + timedelta(days=30)
+    calls = iter(range(10 ** 9))
+
+    def call():
+        index = next(calls)
+        _find_price_for_date(accommodations[index % len(accommodations)], index % 2, day + timedelta(days=index % 7))
+
+    bench.run(call, rounds=5000)
@@ -0,0 +1,32 @@
+import pytest
+
+from app.core.metrics import MetricsMiddleware
+
+pytestmark = pytest.mark.benchmark
+
+
+class Route:
+    path = "/bookings/{booking_id}"
+
+
+@pytest.mark.asyncio
+async def test_metrics_middleware_overhead(bench):
+    """Запрос через middleware к приложению, которое сразу отвечает - накладные расходы записи метрик"""
+    async def app(scope, receive, send):
+        scope["route"] = Route
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def send(message):
+        pass
+
+    middleware = MetricsMiddleware(app)
+
+    async def call():
+        await middleware({"type": "http", "method": "GET", "path": "/bookings/1"}, receive, send)
+
+    stats = await bench.run_async(call, warmup=100, rounds=10000)
+    assert stats["median_us"] < 20
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.serialization import compile_serializer, dumps
+from app.models.booking import Booking
+from app.schemas.booking import BookingResponseSchema
+from tests.benchmarks.conftest import DATASETS, Bench
+
+pytestmark = pytest.mark.benchmark
+
+DATASET_IDS = [f"catalog{accommodations}-bookings{bookings}" for accommodations, bookings in DATASETS]
+
+# Во сколько раз compiled-путь должен быть быстрее прежнего (на замерах - примерно в 25 раз)
+MIN_SPEEDUP = 5
+
+
+async def _bookings(session_factory, limit: int = 100) -> list:
+    """Страница броней с вложенным размещением, как в GET /bookings/?limit=100"""
+    async with session_factory() as db:
+        result = await db.execute(
+            select(Booking).options(selectinload(Booking.accommodation)).order_by(Booking.id).limit(limit)
+        )
+        return result.scalars().all()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("dataset", DATASETS[:1], ids=DATASET_IDS[:1])
+async def test_serialize_bookings_speedup(request, session_factory, dataset):
+    """
+    Прежний путь ответа (from_orm, jsonable_encoder, json.dumps) против compile_serializer + orjson.
+    Оба замера в одном прогоне, проверяется отношение медиан, а не baseline.json:
+    абсолютное время вызова с большим количеством мусора для GC слишком шумное для сравнения между прогонами.
+    """
+    bookings = await _bookings(session_factory)
+    serialize = compile_serializer(BookingResponseSchema)
+
+    def pydantic_call():
+        json.dumps(jsonable_encoder([BookingResponseSchema.from_orm(booking) for booking in bookings]))
+
+    def compiled_call():
+        dumps([serialize(booking) for booking in bookings])
+
+    # Без baseline: результаты только попадают в отчет
+    pydantic = Bench(f"{request.node.name}[pydantic]", None).run(pydantic_call, warmup=20, rounds=200)
+    compiled = Bench(f"{request.node.name}[compiled]", None).run(compiled_call, warmup=50, rounds=1000)
+    assert compiled["median_us"] * MIN_SPEEDUP < pydantic["median_us"]
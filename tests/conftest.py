@@ -2,13 +2,17 @@ import pytest
 from httpx import AsyncClient
 from app.main import app
 from app.db.base import Base
-from app.db.session import test_async_engine, get_async_db
+from app.db.session import test_async_engine, get_async_db, get_async_read_db
+from app.services.catalog_cache import catalog_cache
+from app.services.idempotency import idempotency_store
 from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 
 
 @pytest.fixture(scope="function", autouse=True)
 async def setup_db():
     """Фикстура для создания/удаления таблиц перед каждым тестом"""
+    catalog_cache.invalidate()
+    idempotency_store.clear()
     async with test_async_engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -46,9 +50,11 @@ async def db_session():
 @pytest.fixture
 async def async_client(db_session):
     """Фикстура тестового клиента с подменой зависимостей"""
-    # Подменяем зависимость get_async_db
-    original_dependency = app.dependency_overrides.get(get_async_db)
-    app.dependency_overrides[get_async_db] = lambda: db_session
+    # Подменяем зависимости get_async_db и get_async_read_db: запись и чтение идут в одну тестовую сессию
+    dependencies = (get_async_db, get_async_read_db)
+    original_dependencies = {dependency: app.dependency_overrides.get(dependency) for dependency in dependencies}
+    for dependency in dependencies:
+        app.dependency_overrides[dependency] = lambda: db_session
 
     async with AsyncClient(
             app=app,
@@ -57,11 +63,41 @@ async def async_client(db_session):
     ) as client:
         yield client
 
-    # Восстанавливаем оригинальную зависимость
-    if original_dependency is not None:
-        app.dependency_overrides[get_async_db] = original_dependency
-    else:
-        app.dependency_overrides.pop(get_async_db, None)
+    # Восстанавливаем оригинальные зависимости
+    for dependency, original_dependency in original_dependencies.items():
+        if original_dependency is not None:
+            app.dependency_overrides[dependency] = original_dependency
+        else:
+            app.dependency_overrides.pop(dependency, None)
+
+def accommodation_payload(**overrides):
+    """Данные для POST /accommodations/ с одинаковой ценой в будни и выходные"""
+    data = {
+        "name": "Тестовый дом",
+        "type": "guest_house",
+        "capacity": 4,
+        "count": 1,
+        "check_in_time": "15:00",
+        "check_out_time": "12:00",
+        "extra_beds_available": 0,
+        "prices": [
+            {"weekday_type": "weekday", "price": 100.0, "extra_bed_price": 0.0},
+            {"weekday_type": "weekend", "price": 100.0, "extra_bed_price": 0.0}
+        ]
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def create_accommodation(async_client):
+    """Фабрика размещений через API, возвращает id созданного размещения"""
+    async def factory(**overrides):
+        response = await async_client.post("/accommodations/", json=accommodation_payload(**overrides))
+        assert response.status_code == 200
+        return response.json()["id"]
+
+    return factory
 
 # @pytest.fixture(scope="module")
 # def test_db():
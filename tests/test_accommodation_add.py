@@ -0,0 +1,81 @@
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.models.accommodation import Accommodation, AccommodationPrice
+
+
+def form(*blocks):
+    """
+    Данные формы /accommodations/add: поля размещения повторяются по разу на блок,
+    строки цен (тип дня, цена, цена доп. места) - с номером своего блока
+    """
+    fields = [
+        "name", "type", "short_description", "capacity", "count", "check_in_time", "check_out_time",
+        "extra_beds_available",
+    ]
+    data = {field: [str(block.get(field, "")) for block in blocks] for field in fields}
+    data.update({"price_entry": [], "price_weekday_type": [], "price": [], "price_extra_bed_price": []})
+    for index, block in enumerate(blocks):
+        for weekday_type, price, extra_bed_price in block.get("prices", []):
+            data["price_entry"].append(str(index))
+            data["price_weekday_type"].append(weekday_type)
+            data["price"].append(str(price))
+            data["price_extra_bed_price"].append(str(extra_bed_price))
+    return data
+
+
+HOUSE = {"name": "Дом у озера", "type": "guest_house", "capacity": 4, "count": 2, "extra_beds_available": 1,
+         "prices": [("weekday", 5000, 500), ("weekend", 7000, ""), ("anyday", "", "")]}
+GAZEBO = {"name": "Беседка", "type": "gazebo", "capacity": 10, "prices": [("anyday", 1500, "")],
+          "check_in_time": "10:00", "check_out_time": "22:00"}
+
+
+@pytest.mark.asyncio
+async def test_admin_form_creates_several_accommodations(async_client, db_session):
+    response = await async_client.post(
+        "/accommodations/add", data=form({"type": "hotel_room", "prices": [("weekday", 100, "")]}, HOUSE, GAZEBO)
+    )
+    assert response.status_code == 200  # После редиректа - снова страница формы
+
+    result = await db_session.execute(select(Accommodation).order_by(Accommodation.id))
+    house, gazebo = result.scalars().all()
+    assert (house.name, house.count, house.short_description) == ("Дом у озера", 2, None)
+    assert gazebo.check_in_time.strftime("%H:%M") == "10:00"
+
+    prices = await db_session.execute(
+        select(AccommodationPrice.weekday_type, AccommodationPrice.price, AccommodationPrice.extra_bed_price)
+        .where(AccommodationPrice.accommodation_id == house.id)
+        .order_by(AccommodationPrice.weekday_type)
+    )
+    assert [(weekday_type.value, float(price), float(extra)) for weekday_type, price, extra in prices] == [
+        ("weekday", 5000, 500), ("weekend", 7000, 0)
+    ]
+    prices = await db_session.execute(
+        select(AccommodationPrice.weekday_type, AccommodationPrice.price).where(AccommodationPrice.accommodation_id == gazebo.id)
+    )
+    assert [(weekday_type.value, float(price)) for weekday_type, price in prices] == [("anyday", 1500)]
+
+    response = await async_client.get("/accommodations/")
+    assert {accommodation["name"] for accommodation in response.json()} == {"Дом у озера", "Беседка"}
+
+
+@pytest.mark.asyncio
+async def test_admin_form_rejects_whole_post_on_error(async_client, db_session):
+    for gazebo in (
+        {**GAZEBO, "prices": [("weekend", "дорого", "")]},
+        {**GAZEBO, "prices": []},
+        {**GAZEBO, "prices": [("anyday", 1500, ""), ("anyday", 2000, "")]},
+    ):
+        response = await async_client.post("/accommodations/add", data=form(HOUSE, gazebo))
+        assert response.status_code == 400
+        assert "Беседка" in response.text
+
+    assert await db_session.scalar(select(func.count()).select_from(Accommodation)) == 0
+
+    response = await async_client.post("/accommodations/add", data=form({"type": "gazebo"}))
+    assert response.status_code == 400
+
+    data = form(HOUSE)
+    data["price_entry"][0] = "5"  # Блока с таким номером нет
+    assert (await async_client.post("/accommodations/add", data=data)).status_code == 400
@@ -1,7 +1,13 @@
 from select import select
+from datetime import date, timedelta
+import brotli
+from app.core.config import OCCUPANCY_HORIZON_DAYS
+from app.db.session import test_async_engine
 from app.models.accommodation import Accommodation
+from app.services.catalog_cache import catalog_cache
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
@@ -43,4 +49,282 @@ async def test_create_accommodation(async_client: AsyncClient):
     assert response.status_code == 200
 
     data = response.json()
-    assert data["name"] == "Тестовый дом"
\ No newline at end of file
+    assert data["name"] == "Тестовый дом"
+
+@pytest.mark.asyncio
+async def test_find_available_accommodations(async_client: AsyncClient, create_accommodation):
+    free_id = await create_accommodation(name="Свободный дом")
+    booked_id = await create_accommodation(name="Занятый дом")
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo", count=3)
+
+    check_in = date.today() + timedelta(days=20)
+    check_out = check_in + timedelta(days=2)
+    response = await async_client.post("/bookings/", json={
+        "accommodation_id": booked_id,
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "guests": 2,
+        "guest_name": "Иван",
+        "guest_phone": "+79990000000",
+        "guest_email": "ivan@example.com",
+        "total_price": 200.0,
+    })
+    assert response.status_code == 201
+
+    params = {"check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 2}
+    response = await async_client.get("/accommodations/find", params=params)
+    assert response.status_code == 200
+    found = {item["accommodation"]["id"]: item for item in response.json()}
+    assert set(found) == {free_id}  # Беседка бронируется только на один день
+    assert found[free_id]["total_price"] == 200.0
+    assert found[free_id]["nights"] == 2
+
+    params["check_out_date"] = check_in.isoformat()
+    response = await async_client.get("/accommodations/find", params=params)
+    assert gazebo_id in [item["accommodation"]["id"] for item in response.json()]
+
+
+@pytest.mark.asyncio
+async def test_find_query_count_does_not_grow(async_client: AsyncClient, create_accommodation):
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    check_in = date.today() + timedelta(days=5)
+    params = {
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=14)).isoformat(),
+        "guests": 2,
+    }
+
+    await create_accommodation(name="Дом 1")
+    event.listen(test_async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        await async_client.get("/accommodations/find", params=params)
+        small_catalog = len(statements)
+
+        for i in range(10):
+            await create_accommodation(name=f"Дом {i + 2}")
+        statements.clear()
+        await async_client.get("/accommodations/find", params=params)
+    finally:
+        event.remove(test_async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert len(statements) == small_catalog
+
+
+@pytest.mark.asyncio
+async def test_catalog_cache_hits_and_invalidation(async_client: AsyncClient, create_accommodation):
+    first_id = await create_accommodation(name="Первый дом")
+
+    response = await async_client.get("/accommodations/")
+    hits = catalog_cache.hits
+    cached = await async_client.get("/accommodations/")
+    assert catalog_cache.hits == hits + 1
+    assert cached.json() == response.json()
+    assert cached.json()[0]["check_in_time"] == "15:00"
+
+    response = await async_client.get(f"/accommodations/{first_id}")
+    assert response.json()["name"] == "Первый дом"
+
+    # Создание размещения сбрасывает закэшированный каталог
+    await create_accommodation(name="Второй дом")
+    response = await async_client.get("/accommodations/")
+    assert [item["name"] for item in response.json()] == ["Первый дом", "Второй дом"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_snapshot_etag_and_compression(async_client: AsyncClient, create_accommodation):
+    await create_accommodation(name="Дом", full_description="Очень длинное описание " * 200)
+
+    response = await async_client.get("/accommodations/", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()[0]["name"] == "Дом"
+    etag = response.headers["etag"]
+
+    # brotli предпочтительнее gzip; httpx распаковывает тело сам, сверяем и сжатые байты
+    response = await async_client.get("/accommodations/", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["etag"] == etag
+    assert response.json()[0]["name"] == "Дом"
+    snapshot = catalog_cache.get("accommodations")
+    assert brotli.decompress(snapshot.encoded["br"]) == response.content == snapshot.body
+
+    statements = []
+
+    def count_statement(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_async_engine.sync_engine, "before_cursor_execute", count_statement)
+    try:
+        response = await async_client.get("/accommodations/", headers={"If-None-Match": etag})
+    finally:
+        event.remove(test_async_engine.sync_engine, "before_cursor_execute", count_statement)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert statements == []
+
+    response = await async_client.get("/accommodations/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == etag
+
+    # После изменения каталога снимок перестраивается, ETag меняется
+    await create_accommodation(name="Второй дом")
+    response = await async_client.get("/accommodations/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_find_flexible_matches_single_searches(async_client: AsyncClient, create_accommodation):
+    """Каждый вариант гибкого поиска совпадает с отдельным запросом /find на те же даты"""
+    prices = [
+        {"weekday_type": "weekday", "price": 100.0, "extra_bed_price": 10.0},
+        {"weekday_type": "weekend", "price": 150.0, "extra_bed_price": 20.0},
+    ]
+    house_id = await create_accommodation(name="Дом", capacity=2, extra_beds_available=1, prices=prices)
+    await create_accommodation(name="Беседка", type="gazebo", count=2, prices=prices)
+
+    window_start = date.today() + timedelta(days=30)
+    window_end = window_start + timedelta(days=21)
+    booked_in = window_start + timedelta(days=8)
+    response = await async_client.post("/bookings/", json={
+        "accommodation_id": house_id,
+        "check_in_date": booked_in.isoformat(),
+        "check_out_date": (booked_in + timedelta(days=1)).isoformat(),
+        "guests": 2,
+        "guest_name": "Иван",
+        "guest_phone": "+79990000000",
+        "guest_email": "ivan@example.com",
+        "total_price": (await async_client.get("/accommodations/find", params={
+            "check_in_date": booked_in.isoformat(),
+            "check_out_date": (booked_in + timedelta(days=1)).isoformat(),
+            "guests": 2,
+        })).json()[0]["total_price"],
+    })
+    assert response.status_code == 201
+
+    for params in (
+        {"window_start": window_start.isoformat(), "window_end": window_end.isoformat(), "nights": 2},
+        {"window_start": window_start.isoformat(), "window_end": window_end.isoformat(), "nights": 0},
+        {"ranges": [f"{window_start}/{window_start + timedelta(days=3)}", f"{booked_in}/{booked_in}"]},
+    ):
+        response = await async_client.get("/accommodations/find/flexible", params={**params, "guests": 3})
+        assert response.status_code == 200
+        flexible = {
+            (item["accommodation"]["id"], option["check_in_date"], option["check_out_date"]): option
+            for item in response.json() for option in item["options"]
+        }
+
+        candidates = {(check_in, check_out) for _, check_in, check_out in flexible}
+        expected = {}
+        for check_in, check_out in candidates:
+            found = await async_client.get("/accommodations/find", params={
+                "check_in_date": check_in, "check_out_date": check_out, "guests": 3
+            })
+            for item in found.json():
+                expected[(item["accommodation"]["id"], check_in, check_out)] = item["total_price"]
+
+        assert {key: option["total_price"] for key, option in flexible.items()} == expected
+
+    # Занятые ночи не попадают в варианты дома
+    response = await async_client.get("/accommodations/find/flexible", params={
+        "window_start": window_start.isoformat(), "window_end": window_end.isoformat(), "nights": 2, "guests": 1
+    })
+    house = next(item for item in response.json() if item["accommodation"]["id"] == house_id)
+    check_ins = {option["check_in_date"] for option in house["options"]}
+    assert (booked_in - timedelta(days=1)).isoformat() not in check_ins
+    assert booked_in.isoformat() not in check_ins
+    assert len(check_ins) == 20 - 2  # 20 заездов в окне 21 день, две ночи заняты
+
+    # Только заезды в пятницу
+    response = await async_client.get("/accommodations/find/flexible", params={
+        "window_start": window_start.isoformat(), "window_end": window_end.isoformat(),
+        "nights": 2, "check_in_weekdays": [4], "guests": 1
+    })
+    assert all(
+        date.fromisoformat(option["check_in_date"]).weekday() == 4
+        for item in response.json() for option in item["options"]
+    )
+
+    response = await async_client.get("/accommodations/find/flexible", params={"guests": 1, "ranges": ["2025-01"]})
+    assert response.status_code == 400
+
+    # Даты дальше горизонта бронирования (вплоть до date.max) - 400, а не переполнение
+    for params in (
+            {"ranges": ["9999-12-31/9999-12-31"]},
+            {"window_start": date.today().isoformat(), "window_end": "9999-12-31", "nights": 2},
+            {"window_start": "0001-01-01", "window_end": date.today().isoformat(), "nights": 2},
+    ):
+        response = await async_client.get("/accommodations/find/flexible", params={"guests": 1, **params})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_calendar_shows_free_units_and_prices(async_client: AsyncClient, create_accommodation):
+    prices = [
+        {"weekday_type": "weekday", "price": 100.0, "extra_bed_price": 0.0},
+        {"weekday_type": "weekend", "price": 150.0, "extra_bed_price": 0.0},
+    ]
+    house_id = await create_accommodation(name="Дом", count=2, prices=prices)
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo", count=1, prices=prices)
+
+    month_start = (date.today() + timedelta(days=40)).replace(day=1)
+    month = month_start.strftime("%Y-%m")
+    friday = month_start + timedelta(days=(4 - month_start.weekday()) % 7)
+
+    async def book(accommodation_id, check_in, check_out):
+        found = await async_client.get("/accommodations/find", params={
+            "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 2
+        })
+        item = next(item for item in found.json() if item["accommodation"]["id"] == accommodation_id)
+        response = await async_client.post("/bookings/", json={
+            "accommodation_id": accommodation_id,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": check_out.isoformat(),
+            "guests": 2,
+            "guest_name": "Иван",
+            "guest_phone": "+79990000000",
+            "guest_email": "ivan@example.com",
+            "total_price": item["total_price"],
+            "quote_token": item["quote_token"],
+        })
+        assert response.status_code == 201
+
+    await book(house_id, friday, friday + timedelta(days=2))
+
+    response = await async_client.get(f"/accommodations/{house_id}/calendar", params={"month": month})
+    assert response.status_code == 200
+    days = {day["date"]: day for day in response.json()["days"]}
+    assert len(days) == ((month_start + timedelta(days=32)).replace(day=1) - month_start).days
+    assert days[friday.isoformat()] == {"date": friday.isoformat(), "free_units": 1, "price": 150.0}  # ночь на субботу
+    assert days[(friday + timedelta(days=2)).isoformat()]["free_units"] == 2
+    assert days[(friday + timedelta(days=2)).isoformat()]["price"] == 100.0  # ночь на понедельник
+
+    # Бронь в этом месяце сбрасывает закэшированный календарь
+    await book(house_id, friday, friday + timedelta(days=1))
+    await book(gazebo_id, friday, friday)
+    response = await async_client.get("/accommodations/calendar", params={"month": month, "ids": [house_id, gazebo_id]})
+    calendars = {calendar["accommodation_id"]: calendar["days"] for calendar in response.json()}
+    house_days = {day["date"]: day for day in calendars[house_id]}
+    gazebo_days = {day["date"]: day for day in calendars[gazebo_id]}
+    assert house_days[friday.isoformat()]["free_units"] == 0
+    assert gazebo_days[friday.isoformat()] == {"date": friday.isoformat(), "free_units": 0, "price": 100.0}
+    assert gazebo_days[(friday + timedelta(days=1)).isoformat()]["free_units"] == 1
+
+    assert (await async_client.get("/accommodations/calendar", params={"month": "2025-13"})).status_code == 400
+    assert (await async_client.get("/accommodations/calendar", params={"month": "9999-12"})).status_code == 400
+    assert (await async_client.get(f"/accommodations/{house_id}/calendar", params={"month": "9999-12"})).status_code == 400
+
+    # Календари кэшируются по месяцам, поэтому месяцы ограничены горизонтом бронирования
+    today = date.today()
+    last_month = today + timedelta(days=OCCUPANCY_HORIZON_DAYS)
+    past_month = today.replace(day=1) - timedelta(days=1)
+    next_after_last = (last_month.replace(day=1) + timedelta(days=32)).replace(day=1)
+    for allowed, month_day in ((True, today), (True, last_month), (False, past_month), (False, next_after_last)):
+        response = await async_client.get(f"/accommodations/{house_id}/calendar", params={"month": month_day.strftime("%Y-%m")})
+        assert (response.status_code == 200) is allowed
+    assert (await async_client.get("/accommodations/999/calendar", params={"month": month})).status_code == 404
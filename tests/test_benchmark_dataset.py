@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.models.accommodation import Accommodation
+from app.models.booking import AccommodationOccupancy, Booking
+from app.services.occupancy_matrix import OccupancyMatrix, verify_occupancy_matrix
+from benchmarks.dataset import generate_dataset
+
+
+@pytest.mark.asyncio
+async def test_dataset_occupancy_matches_bookings(db_session):
+    """Учет занятости синтетических данных совпадает с бронями и не превышает count"""
+    start = date.today() - timedelta(days=30)
+    stats = await generate_dataset(db_session, accommodations=10, bookings=500, start=start, days=120)
+
+    assert stats["accommodations"] == 10
+    assert 0 < stats["bookings"] <= 500
+    assert await db_session.scalar(select(func.count()).select_from(Booking)) == stats["bookings"]
+
+    matrix = OccupancyMatrix(horizon_days=120)
+    await matrix.load(db_session, start)
+    assert await verify_occupancy_matrix(db_session, matrix) == []
+
+    overbooked = await db_session.scalar(
+        select(func.count())
+        .select_from(AccommodationOccupancy)
+        .join(Accommodation, Accommodation.id == AccommodationOccupancy.accommodation_id)
+        .where(AccommodationOccupancy.booked_units > Accommodation.count)
+    )
+    assert overbooked == 0
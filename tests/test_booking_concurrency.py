@@ -0,0 +1,85 @@
+import asyncio
+from datetime import date, timedelta
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.core.config import DatabaseSettings
+from app.db.base import Base
+from app.db.engine import create_async_engine_from_settings
+from app.db.session import get_async_db
+from app.main import app
+from app.models.accommodation import Accommodation, AccommodationPrice
+from app.models.booking import AccommodationOccupancy, Booking
+from app.utils.enums import AccommodationType, Weekday
+
+
+@pytest.fixture
+async def file_sessionmaker(tmp_path):
+    """Сессии на отдельном файле SQLite - у каждого запроса свое соединение, как в проде"""
+    engine = create_async_engine_from_settings(DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'concurrency.db'}"))
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with sessionmaker() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield sessionmaker
+    app.dependency_overrides.pop(get_async_db, None)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parallel_bookings_do_not_overbook(file_sessionmaker):
+    async with file_sessionmaker() as db:
+        accommodations = [
+            Accommodation(name=f"Дом {i}", type=AccommodationType.guest_house, capacity=4, count=1)
+            for i in range(2)
+        ]
+        db.add_all(accommodations)
+        await db.flush()
+        for accommodation in accommodations:
+            db.add_all([
+                AccommodationPrice(accommodation_id=accommodation.id, weekday_type=weekday_type, price=100, extra_bed_price=0)
+                for weekday_type in (Weekday.weekday, Weekday.weekend)
+            ])
+        await db.commit()
+        accommodation_ids = [accommodation.id for accommodation in accommodations]
+
+    check_in = date.today() + timedelta(days=30)
+
+    def booking(accommodation_id, i):
+        return {
+            "accommodation_id": accommodation_id,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "guests": 2,
+            "guest_name": f"Гость {i}",
+            "guest_phone": "+79990000000",
+            "guest_email": "guest@example.com",
+            "total_price": 200.0,
+        }
+
+    async with AsyncClient(app=app, base_url="http://test", timeout=60) as client:
+        responses = await asyncio.gather(*[
+            client.post("/bookings/", json=booking(accommodation_ids[i % 2], i)) for i in range(200)
+        ])
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == 2
+    assert set(statuses) <= {201, 400, 503}
+
+    async with file_sessionmaker() as db:
+        booked = await db.execute(
+            select(Booking.accommodation_id, func.count()).group_by(Booking.accommodation_id)
+        )
+        assert dict(booked.all()) == {accommodation_id: 1 for accommodation_id in accommodation_ids}
+
+        max_units = await db.scalar(select(func.max(AccommodationOccupancy.booked_units)))
+        assert max_units == 1
@@ -0,0 +1,346 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.future import select
+
+from app.core.config import QUOTE_TOKEN_TTL
+from app.core.security import QuoteTokenError, sign_quote, verify_quote
+from app.models.booking import AccommodationOccupancy
+from app.services import booking_export, booking_import
+from app.services.booking_service import check_accommodation_availability
+from app.utils.helpers import encode_cursor
+
+
+def booking_data(accommodation_id, check_in, check_out, total_price, **overrides):
+    data = {
+        "accommodation_id": accommodation_id,
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "guests": 2,
+        "guest_name": "Иван",
+        "guest_phone": "+79990000000",
+        "guest_email": "ivan@example.com",
+        "total_price": total_price,
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.mark.asyncio
+async def test_create_booking_updates_occupancy(async_client: AsyncClient, db_session, create_accommodation):
+    accommodation_id = await create_accommodation()
+
+    check_in = date.today() + timedelta(days=30)
+    check_out = check_in + timedelta(days=3)
+    response = await async_client.post(
+        "/bookings/", json=booking_data(accommodation_id, check_in, check_out, 300.0)
+    )
+    assert response.status_code == 201
+
+    result = await db_session.execute(
+        select(AccommodationOccupancy)
+        .where(AccommodationOccupancy.accommodation_id == accommodation_id)
+        .order_by(AccommodationOccupancy.date)
+    )
+    rows = result.scalars().all()
+    assert [row.date for row in rows] == [check_in + timedelta(days=i) for i in range(3)]
+    assert all(row.booked_units == 1 for row in rows)
+
+    # Пересекающийся период уже занят, соседний - свободен
+    assert not await check_accommodation_availability(
+        db_session, accommodation_id, check_out - timedelta(days=1), check_out + timedelta(days=2)
+    )
+    assert await check_accommodation_availability(
+        db_session, accommodation_id, check_out, check_out + timedelta(days=2)
+    )
+
+    response = await async_client.post(
+        "/bookings/", json=booking_data(accommodation_id, check_in, check_out, 300.0)
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_gazebo_occupies_single_day(async_client: AsyncClient, db_session, create_accommodation):
+    accommodation_id = await create_accommodation(name="Беседка", type="gazebo", count=2)
+
+    day = date.today() + timedelta(days=10)
+    for _ in range(2):
+        response = await async_client.post(
+            "/bookings/", json=booking_data(accommodation_id, day, day, 100.0)
+        )
+        assert response.status_code == 201
+
+    assert not await check_accommodation_availability(db_session, accommodation_id, day, day)
+    assert await check_accommodation_availability(
+        db_session, accommodation_id, day + timedelta(days=1), day + timedelta(days=1)
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_bookings_cursor_pagination(async_client: AsyncClient, create_accommodation):
+    accommodation_id = await create_accommodation(count=10)
+    check_in = date.today() + timedelta(days=7)
+    booking_ids = []
+    for i in range(5):
+        response = await async_client.post(
+            "/bookings/", json=booking_data(accommodation_id, check_in, check_in + timedelta(days=1), 100.0)
+        )
+        booking_ids.append(response.json()["id"])
+
+    pages = []
+    params = {"limit": 2}
+    while True:
+        response = await async_client.get("/bookings/", params=params)
+        assert response.status_code == 200
+        pages.append([booking["id"] for booking in response.json()])
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+
+    assert pages == [booking_ids[4:2:-1], booking_ids[2:0:-1], booking_ids[:1]]
+
+    response = await async_client.get("/bookings/", params={"cursor": "испорчен"})
+    assert response.status_code == 400
+
+    # Курсор на несуществующую запись и {"id": true} не дают молча пустую страницу
+    for cursor in (encode_cursor(max(booking_ids) + 1), base64.urlsafe_b64encode(b'{"id":true}').decode()):
+        response = await async_client.get("/bookings/", params={"cursor": cursor})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_get_bookings_by_target_date(async_client: AsyncClient, create_accommodation):
+    house_id = await create_accommodation(count=5)
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo", count=5)
+    day = date.today() + timedelta(days=10)
+
+    stays = {
+        "house": (house_id, day - timedelta(days=2), day + timedelta(days=1), 300.0),
+        "house_leaving": (house_id, day - timedelta(days=2), day, 200.0),
+        "house_arriving": (house_id, day, day + timedelta(days=2), 200.0),
+        "gazebo": (gazebo_id, day, day, 100.0),
+        "gazebo_next_day": (gazebo_id, day + timedelta(days=1), day + timedelta(days=1), 100.0),
+    }
+    ids = {}
+    for name, (accommodation_id, check_in, check_out, total_price) in stays.items():
+        response = await async_client.post(
+            "/bookings/", json=booking_data(accommodation_id, check_in, check_out, total_price)
+        )
+        ids[response.json()["id"]] = name
+
+    response = await async_client.get("/bookings/", params={"target_date": day.isoformat()})
+    assert {ids[booking["id"]] for booking in response.json()} == {"house", "house_arriving", "gazebo"}
+
+
+@pytest.mark.asyncio
+async def test_booking_with_quote_token(async_client: AsyncClient, create_accommodation):
+    accommodation_id = await create_accommodation(count=3)
+    check_in = date.today() + timedelta(days=14)
+    check_out = check_in + timedelta(days=2)
+
+    response = await async_client.get("/accommodations/find", params={
+        "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 2,
+    })
+    quote_token = response.json()[0]["quote_token"]
+
+    # Цена берется из токена и должна совпасть с показанной гостю
+    data = booking_data(accommodation_id, check_in, check_out, 150.0, quote_token=quote_token)
+    response = await async_client.post("/bookings/", json=data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Произошла ошибка в цене"
+
+    data["total_price"] = 200.0
+    response = await async_client.post("/bookings/", json=data)
+    assert response.status_code == 201
+
+    response = await async_client.get(f"/bookings/{response.json()['id']}")
+    assert response.json()["total_price"] == 200.0
+
+    # Подделанный токен и токен на другие даты отклоняются
+    body, signature = quote_token.split(".")
+    data["quote_token"] = body[:-2] + "AA." + signature
+    assert (await async_client.post("/bookings/", json=data)).status_code == 400
+
+    data = booking_data(accommodation_id, check_in, check_out + timedelta(days=1), 200.0, quote_token=quote_token)
+    assert (await async_client.post("/bookings/", json=data)).status_code == 400
+
+
+def test_quote_token_expires():
+    check_in = date(2026, 11, 1)
+    token = sign_quote(1, check_in, check_in + timedelta(days=1), 2, Decimal("1500.00"), now=1000)
+
+    quote = verify_quote(token, now=1000 + QUOTE_TOKEN_TTL - 1)
+    assert quote.total == Decimal("1500.00")
+    assert quote.accommodation_id == 1
+
+    with pytest.raises(QuoteTokenError):
+        verify_quote(token, now=1000 + QUOTE_TOKEN_TTL + 1)
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_replays_first_response(async_client: AsyncClient, create_accommodation):
+    accommodation_id = await create_accommodation(count=5)
+    check_in = date.today() + timedelta(days=3)
+    data = booking_data(accommodation_id, check_in, check_in + timedelta(days=1), 100.0)
+    headers = {"Idempotency-Key": "retry-1"}
+
+    responses = await asyncio.gather(*[
+        async_client.post("/bookings/", json=data, headers=headers) for _ in range(5)
+    ])
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 4
+
+    response = await async_client.get("/bookings/")
+    assert len(response.json()) == 1
+
+    data["guests"] = 3
+    response = await async_client.post("/bookings/", json=data, headers=headers)
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_reports_each_row(async_client: AsyncClient, db_session, create_accommodation):
+    house_id = await create_accommodation(count=2)
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo")
+    check_in = date.today() + timedelta(days=40)
+    check_out = check_in + timedelta(days=3)
+
+    rows = [
+        booking_data(house_id, check_in, check_out, 300.0),
+        booking_data(house_id, check_in + timedelta(days=1), check_out, 200.0),
+        booking_data(house_id, check_in + timedelta(days=2), check_out, 100.0),  # Обе единицы уже заняты
+        booking_data(house_id, check_out, check_out + timedelta(days=1), 100.0),
+        booking_data(gazebo_id, check_in, check_in, 100.0),
+        booking_data(gazebo_id, check_in, check_out, 100.0),  # Беседка только на один день
+        booking_data(999, check_in, check_out, 100.0),
+        {"accommodation_id": house_id},
+    ]
+    response = await async_client.post("/bookings/bulk", json=rows)
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == [
+        "accepted", "accepted", "rejected", "accepted", "accepted", "rejected", "rejected", "rejected"
+    ]
+    assert data["accepted"] == 4 and data["rejected"] == 4
+
+    result = await db_session.execute(
+        select(AccommodationOccupancy.date, AccommodationOccupancy.booked_units)
+        .where(AccommodationOccupancy.accommodation_id == house_id)
+        .order_by(AccommodationOccupancy.date)
+    )
+    assert [units for _, units in result] == [1, 2, 2, 1]
+    assert not await check_accommodation_availability(db_session, gazebo_id, check_in, check_in)
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_ndjson_in_chunks(async_client: AsyncClient, db_session, create_accommodation, monkeypatch):
+    monkeypatch.setattr(booking_import, "BULK_IMPORT_CHUNK_SIZE", 2)
+    house_id = await create_accommodation(count=10)
+    check_in = date.today() + timedelta(days=5)
+
+    lines = [json.dumps(booking_data(house_id, check_in, check_in + timedelta(days=1), 100.0)) for _ in range(5)]
+    lines.insert(2, "{не json")
+    response = await async_client.post(
+        "/bookings/bulk", content="\n".join(lines), headers={"Content-Type": "application/x-ndjson"}
+    )
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["accepted"] * 2 + ["rejected"] + ["accepted"] * 3
+    assert len({result["id"] for result in results if result["status"] == "accepted"}) == 5
+
+    units = await db_session.scalar(
+        select(AccommodationOccupancy.booked_units).where(AccommodationOccupancy.accommodation_id == house_id)
+    )
+    assert units == 5
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_releases_units_of_rejected_chunk(
+        async_client: AsyncClient, db_session, create_accommodation, monkeypatch
+):
+    monkeypatch.setattr(booking_import, "BULK_IMPORT_CHUNK_SIZE", 1)
+    house_id = await create_accommodation(count=1)
+    check_in = date.today() + timedelta(days=5)
+    apply_booked_units = booking_import._apply_booked_units
+    calls = []
+
+    async def fail_first_chunk(db, booked_units):
+        calls.append(booked_units)
+        if len(calls) == 1:
+            raise booking_import.ChunkRejected("Конфликт с параллельным бронированием, повторите загрузку строки")
+        await apply_booked_units(db, booked_units)
+
+    monkeypatch.setattr(booking_import, "_apply_booked_units", fail_first_chunk)
+    rows = [booking_data(house_id, check_in, check_in + timedelta(days=2), 100.0) for _ in range(3)]
+    results = (await async_client.post("/bookings/bulk", json=rows)).json()["results"]
+
+    # Первая пачка не записана - ее дни свободны для второй строки, третья упирается во вторую
+    assert [result["status"] for result in results] == ["rejected", "accepted", "rejected"]
+    assert results[2]["error"] == "Уже забронировано"
+    units = await db_session.execute(
+        select(AccommodationOccupancy.booked_units).where(AccommodationOccupancy.accommodation_id == house_id)
+    )
+    assert units.scalars().all() == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_export_bookings_streams_csv_and_ndjson(async_client: AsyncClient, create_accommodation, monkeypatch):
+    monkeypatch.setattr(booking_export, "BOOKING_EXPORT_CHUNK_SIZE", 2)
+    house_id = await create_accommodation(count=10)
+    check_in = date.today() + timedelta(days=10)
+
+    rows = [
+        booking_data(house_id, check_in + timedelta(days=i), check_in + timedelta(days=i + 1), 100.0, guest_name=f"Гость {i}")
+        for i in range(5)
+    ]
+    assert (await async_client.post("/bookings/bulk", json=rows)).json()["accepted"] == 5
+
+    response = await async_client.get("/bookings/export", params={
+        "from": (check_in + timedelta(days=1)).isoformat(), "to": (check_in + timedelta(days=3)).isoformat()
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    exported = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["guest_name"] for row in exported] == ["Гость 1", "Гость 2", "Гость 3"]
+    assert exported[0]["accommodation_name"] == "Тестовый дом"
+    assert Decimal(exported[0]["total_price"]) == 100
+
+    response = await async_client.get("/bookings/export", params={"format": "ndjson"})
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["guest_name"] for row in exported] == [f"Гость {i}" for i in range(5)]
+    assert exported[0]["check_in_date"] == check_in.isoformat()
+    assert exported[0]["total_price"] == 100.0
+
+    response = await async_client.get("/bookings/export", params={"from": "2000-01-01", "to": "2000-01-31"})
+    assert response.text.strip() == ",".join(booking_export.EXPORT_FIELDS)
+    assert (await async_client.get("/bookings/export", params={"format": "xml"})).status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_csv_escapes_formulas(async_client: AsyncClient, create_accommodation):
+    house_id = await create_accommodation()
+    check_in = date.today() + timedelta(days=10)
+    row = booking_data(
+        house_id, check_in, check_in + timedelta(days=1), 100.0,
+        guest_name='=HYPERLINK("http://evil","Иван")', notes="@SUM(A1:A2)",
+    )
+    assert (await async_client.post("/bookings/bulk", json=[row])).json()["accepted"] == 1
+
+    response = await async_client.get("/bookings/export")
+    exported = next(csv.DictReader(io.StringIO(response.text)))
+    assert exported["guest_name"] == '\'=HYPERLINK("http://evil","Иван")'
+    assert exported["notes"] == "'@SUM(A1:A2)"
+    assert exported["guest_phone"] == "+79990000000"
+    assert Decimal(exported["total_price"]) == 100
+
+    # В NDJSON значения не меняются
+    response = await async_client.get("/bookings/export", params={"format": "ndjson"})
+    exported = json.loads(response.text.splitlines()[0])
+    assert exported["guest_name"] == row["guest_name"] and exported["guest_phone"] == "+79990000000"
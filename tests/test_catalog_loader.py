@@ -0,0 +1,107 @@
+import json
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from app.management.load_catalog import load_catalog, read_catalog
+from app.models.accommodation import Accommodation, AccommodationPrice
+from app.models.service import Service, ServicePrice
+from tests.conftest import accommodation_payload
+
+
+def catalog(price=100.0):
+    gazebo = accommodation_payload(
+        name="Беседка", type="gazebo", count=3,
+        prices=[{"weekday_type": "anyday", "price": price, "extra_bed_price": 0.0}]
+    )
+    del gazebo["check_in_time"], gazebo["check_out_time"]
+
+    return {
+        "accommodations": [accommodation_payload(name="Дом 1"), gazebo],
+        "services": [
+            {
+                "name": "Баня", "is_free": False, "is_agreement_required": True,
+                "prices": [{"weekday_type": "anyday", "name": "2 часа", "duration_hours": 2, "price": 3000.0}]
+            }
+        ],
+    }
+
+
+async def count(db, model):
+    return (await db.execute(select(func.count()).select_from(model))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_load_catalog_is_repeatable(db_session):
+    """Повторная загрузка обновляет записи по названию, а не дублирует их"""
+    stats = await load_catalog(db_session, catalog())
+    assert stats["accommodations"] == {"created": 2, "updated": 0, "prices": 3}
+    assert stats["services"] == {"created": 1, "updated": 0, "prices": 1}
+
+    stats = await load_catalog(db_session, catalog(price=250.0))
+    assert stats["accommodations"] == {"created": 0, "updated": 2, "prices": 3}
+
+    assert await count(db_session, Accommodation) == 2
+    assert await count(db_session, AccommodationPrice) == 3
+    assert await count(db_session, Service) == 1
+    assert await count(db_session, ServicePrice) == 1
+
+    gazebo = (await db_session.execute(
+        select(Accommodation).where(Accommodation.name == "Беседка").execution_options(populate_existing=True)
+    )).scalar_one()
+    assert gazebo.count == 3
+    assert gazebo.check_in_time.hour == 15  # значение по умолчанию
+    assert [float(price.price) for price in gazebo.prices] == [250.0]
+
+
+@pytest.mark.asyncio
+async def test_load_catalog_rejects_invalid_rows(db_session):
+    """Ошибка в любой строке - ничего не загружается"""
+    data = catalog()
+    data["accommodations"].append(accommodation_payload(name="Дом 1"))
+    data["accommodations"].append({"name": "Без типа"})
+
+    with pytest.raises(ValueError) as error:
+        await load_catalog(db_session, data)
+
+    assert "Без типа" in str(error.value)
+    assert "Дом 1" in str(error.value)
+    assert await count(db_session, Accommodation) == 0
+
+
+@pytest.mark.asyncio
+async def test_load_catalog_rejects_duplicate_names_in_database(db_session):
+    """Название встречается в БД дважды (например, добавлено через API) - обновлять нечего однозначно"""
+    db_session.add_all([Accommodation(name="Дом 1", type="guest_house", capacity=4, count=1) for _ in range(2)])
+    await db_session.commit()
+
+    with pytest.raises(ValueError) as error:
+        await load_catalog(db_session, catalog())
+
+    assert "'Дом 1' в базе у 2 записей" in str(error.value)
+    assert "Беседка" not in str(error.value)
+
+
+def test_read_csv_catalog(tmp_path):
+    (tmp_path / "accommodations.csv").write_text(
+        "name,type,capacity,count,extra_beds_available,check_in_time\n"
+        "Дом 1,guest_house,4,2,0,14:00\n",
+        encoding="utf-8"
+    )
+    (tmp_path / "accommodation_prices.csv").write_text(
+        "accommodation_name,weekday_type,price,extra_bed_price\n"
+        "Дом 1,weekday,100,0\n"
+        "Дом 1,weekend,150,0\n",
+        encoding="utf-8"
+    )
+
+    data = read_catalog(tmp_path)
+
+    assert data["services"] == []
+    assert data["accommodations"][0]["check_in_time"] == "14:00"
+    assert "check_out_time" not in data["accommodations"][0]
+    assert [price["price"] for price in data["accommodations"][0]["prices"]] == ["100", "150"]
+    # JSON читается как есть
+    (tmp_path / "catalog.json").write_text(json.dumps(data), encoding="utf-8")
+    assert read_catalog(tmp_path / "catalog.json") == data
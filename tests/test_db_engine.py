@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from app.core.config import DatabaseSettings
+from app.db.engine import _engine_options, create_async_engine_from_settings
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_engine_sets_pragmas(tmp_path):
+    settings = DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'pragmas.db'}", sqlite_busy_timeout_ms=1234)
+    engine = create_async_engine_from_settings(settings)
+    try:
+        async with engine.connect() as conn:
+            pragmas = {
+                name: (await conn.execute(text(f"PRAGMA {name}"))).scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size")
+            }
+    finally:
+        await engine.dispose()
+
+    assert pragmas == {
+        "journal_mode": "wal",
+        "synchronous": 1,  # NORMAL
+        "busy_timeout": 1234,
+        "cache_size": -settings.sqlite_cache_size_kib,
+        "mmap_size": settings.sqlite_mmap_size,
+    }
+
+
+def test_pool_options_only_for_server_databases():
+    server = DatabaseSettings(url="postgresql+asyncpg://user:pass@db/resort", pool_size=20, pool_recycle=600)
+    assert _engine_options(server) == {
+        "pool_size": 20, "max_overflow": 10, "pool_timeout": 30.0, "pool_recycle": 600, "pool_pre_ping": True,
+    }
+
+    assert _engine_options(DatabaseSettings(url="sqlite+aiosqlite:///:memory:")) == {
+        "connect_args": {"check_same_thread": False}
+    }
+
+
+@pytest.mark.asyncio
+async def test_sqlite_file_engine_pools_connections(tmp_path):
+    settings = DatabaseSettings(url=f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}", pool_size=3, max_overflow=2)
+    engine = create_async_engine_from_settings(settings)
+    connects = []
+    event.listen(engine.sync_engine, "connect", lambda *args: connects.append(1))
+    try:
+        pool = engine.sync_engine.pool
+        assert isinstance(pool, AsyncAdaptedQueuePool)
+        assert (pool.size(), pool._max_overflow) == (3, 2)
+
+        # Соединение возвращается в пул, PRAGMA выполняются один раз
+        for _ in range(3):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        assert len(connects) == 1
+    finally:
+        await engine.dispose()
+
+    memory = create_async_engine_from_settings(DatabaseSettings(url="sqlite+aiosqlite:///:memory:"))
+    assert isinstance(memory.sync_engine.pool, StaticPool)
+    await memory.dispose()
@@ -0,0 +1,55 @@
+import json
+import logging
+import queue
+
+from app.core.log import JsonFormatter, LocalQueueHandler, SamplingFilter
+
+
+def make_record(name="app.test", level=logging.INFO, msg="Бронь %s", args=(1,), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    payload = json.loads(JsonFormatter().format(make_record(booking_id=7)))
+
+    assert payload["message"] == "Бронь 1"
+    assert payload["level"] == "INFO"
+    assert payload["logger"] == "app.test"
+    assert payload["booking_id"] == 7
+    assert "args" not in payload and "ts" in payload
+
+
+def test_sampling_filter_keeps_warnings():
+    sampling = SamplingFilter({"sqlalchemy.engine": 0.0, "sqlalchemy": 1.0})
+
+    assert not sampling.filter(make_record("sqlalchemy.engine.Engine"))
+    assert sampling.filter(make_record("sqlalchemy.pool"))
+    assert sampling.filter(make_record("sqlalchemy.engine.Engine", level=logging.WARNING))
+    assert sampling.filter(make_record("app.api"))
+
+
+def test_queue_handler_formats_message_in_caller_only_when_enabled():
+    class Expensive:
+        calls = 0
+
+        def __str__(self):
+            Expensive.calls += 1
+            return "expensive"
+
+    records = queue.SimpleQueue()
+    logger = logging.getLogger("tests.log.queue")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(LocalQueueHandler(records))
+    try:
+        logger.debug("Не пишется: %s", Expensive())
+        logger.info("Пишется: %s", Expensive())
+    finally:
+        logger.handlers.clear()
+
+    assert Expensive.calls == 1
+    record = records.get_nowait()
+    assert record.msg == "Пишется: expensive" and record.args is None
+    assert records.empty()
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import Histogram, instrument_engine, registry
+
+
+@pytest.mark.asyncio
+async def test_metrics_use_route_templates(async_client: AsyncClient, create_accommodation):
+    accommodation_id = await create_accommodation()
+    for _ in range(3):
+        assert (await async_client.get(f"/accommodations/{accommodation_id}")).status_code == 200
+    assert (await async_client.get("/accommodations/999")).status_code == 404
+    assert (await async_client.get("/no-such-page")).status_code == 404
+
+    response = await async_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+
+    def value(sample: str) -> float:
+        match = re.search(re.escape(sample) + r" (\S+)", body)
+        assert match, sample
+        return float(match.group(1))
+
+    labels = 'method="GET",route="/accommodations/{accommodation_id}"'
+    assert value(f'http_request_duration_seconds_count{{{labels},status="200"}}') >= 3
+    assert value(f'http_request_duration_seconds_bucket{{{labels},status="404",le="+Inf"}}') >= 1
+    assert value(f'http_response_size_bytes_count{{{labels}}}') >= 4
+    assert 'route="unmatched"' in body
+    assert f"/accommodations/{accommodation_id}\"" not in body  # id не попадает в метки
+    assert value('http_requests_in_progress{method="GET"}') == 0
+    assert "# TYPE db_pool_checkouts_total counter" in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Тест", ("route",), buckets=(0.1, 1.0))
+    for duration in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(("/",), duration)
+
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{route="/",le="0.1"} 2',
+        'test_seconds_bucket{route="/",le="1.0"} 3',
+        'test_seconds_bucket{route="/",le="+Inf"} 4',
+        'test_seconds_sum{route="/"} 5.65',
+        'test_seconds_count{route="/"} 4',
+    ]
+
+
+def test_pool_metrics(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", pool_size=2)
+    uninstrument = instrument_engine(engine, name="test_pool")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+            assert 'db_pool_connections{engine="test_pool",state="checkedout"} 1' in registry.render()
+
+        body = registry.render()
+        assert 'db_pool_checkouts_total{engine="test_pool"} 1' in body
+        assert 'db_pool_checkout_wait_seconds_count{engine="test_pool"} 1' in body
+        assert 'db_pool_connections{engine="test_pool",state="checkedout"} 0' in body
+    finally:
+        uninstrument()
+        engine.dispose()
+
+    # Закрытый движок больше не попадает в сбор метрик пула
+    assert 'db_pool_connections{engine="test_pool"' not in registry.render()
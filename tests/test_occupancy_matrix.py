@@ -0,0 +1,70 @@
+from datetime import date, timedelta
+import pytest
+from httpx import AsyncClient
+
+from app.services import booking_service
+from app.services.occupancy_matrix import OccupancyMatrix, verify_occupancy_matrix
+
+
+async def book(async_client, accommodation_id, check_in, check_out, total_price):
+    response = await async_client.post("/bookings/", json={
+        "accommodation_id": accommodation_id,
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": check_out.isoformat(),
+        "guests": 2,
+        "guest_name": "Иван",
+        "guest_phone": "+79990000000",
+        "guest_email": "ivan@example.com",
+        "total_price": total_price,
+    })
+    assert response.status_code == 201
+
+
+@pytest.mark.asyncio
+async def test_matrix_matches_sql(async_client: AsyncClient, db_session, create_accommodation, monkeypatch):
+    house_id = await create_accommodation(name="Дом", count=2)
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo", count=2)
+    day = date.today() + timedelta(days=3)
+    await book(async_client, house_id, day, day + timedelta(days=4), 400.0)
+    await book(async_client, gazebo_id, day, day, 100.0)
+
+    matrix = OccupancyMatrix(horizon_days=60)
+    await matrix.load(db_session)
+    monkeypatch.setattr(booking_service, "occupancy_matrix", matrix)
+    monkeypatch.setattr(booking_service, "AVAILABILITY_ENGINE", "matrix")
+
+    # Новая бронь после загрузки попадает в матрицу
+    await book(async_client, house_id, day + timedelta(days=2), day + timedelta(days=6), 400.0)
+    assert await verify_occupancy_matrix(db_session, matrix) == []
+
+    accommodations = [await db_session.get(booking_service.Accommodation, i) for i in (house_id, gazebo_id)]
+    for check_in, check_out in [(day, day), (day, day + timedelta(days=2)), (day + timedelta(days=2), day + timedelta(days=4))]:
+        from_matrix = await booking_service.get_free_units(db_session, accommodations, check_in, check_out)
+        monkeypatch.setattr(booking_service, "AVAILABILITY_ENGINE", "sql")
+        from_sql = await booking_service.get_free_units(db_session, accommodations, check_in, check_out)
+        monkeypatch.setattr(booking_service, "AVAILABILITY_ENGINE", "matrix")
+        assert from_matrix == from_sql
+
+    free_units = await booking_service.get_free_units(
+        db_session, accommodations, day + timedelta(days=2), day + timedelta(days=4)
+    )
+    assert free_units[house_id] == 0
+
+    # Гибкий поиск по матрице и по SQL дает одинаковые варианты
+    candidates = booking_service.flexible_candidates(day, day + timedelta(days=10), 1)
+    from_matrix = await booking_service.find_flexible(db_session, accommodations, candidates, 2)
+    monkeypatch.setattr(booking_service, "AVAILABILITY_ENGINE", "sql")
+    from_sql = await booking_service.find_flexible(db_session, accommodations, candidates, 2)
+    assert from_matrix == from_sql
+
+
+@pytest.mark.asyncio
+async def test_verify_reports_mismatch(async_client: AsyncClient, db_session, create_accommodation):
+    house_id = await create_accommodation(name="Дом")
+    day = date.today() + timedelta(days=1)
+
+    matrix = OccupancyMatrix(horizon_days=30)
+    await matrix.load(db_session)
+    await book(async_client, house_id, day, day + timedelta(days=1), 100.0)
+
+    assert await verify_occupancy_matrix(db_session, matrix) == [(house_id, day, 0, 1)]
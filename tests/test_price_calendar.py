@@ -0,0 +1,79 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+
+from app.services.booking_service import calculate_accommodation_price, _find_price_for_date
+from app.utils.enums import AccommodationType, Weekday
+
+
+def make_accommodation(type=AccommodationType.guest_house, capacity=2):
+    return SimpleNamespace(
+        id=1,
+        name="Дом",
+        type=type,
+        capacity=capacity,
+        prices=[
+            SimpleNamespace(weekday_type=Weekday.weekday, price=Decimal("1000.00"), extra_bed_price=Decimal("150.50")),
+            SimpleNamespace(weekday_type=Weekday.weekend, price=Decimal("1500.00"), extra_bed_price=Decimal("200.25")),
+        ],
+    )
+
+
+def reference_price(accommodation, extra_beds, day):
+    """Прежний поштучный расчет цены одного дня"""
+    target_date = day if accommodation.type == AccommodationType.gazebo else day + timedelta(days=1)
+    weekday_type = Weekday.weekend if target_date.weekday() >= 5 else Weekday.weekday
+    for price in accommodation.prices:
+        if price.weekday_type == weekday_type:
+            return price.price + price.extra_bed_price * extra_beds
+
+
+def test_friday_night_priced_as_saturday():
+    accommodation = make_accommodation()
+    friday = date(2026, 10, 16)
+
+    assert _find_price_for_date(accommodation, 0, friday - timedelta(days=1)) == Decimal("1000.00")
+    assert _find_price_for_date(accommodation, 0, friday) == Decimal("1500.00")
+    assert _find_price_for_date(accommodation, 1, friday + timedelta(days=2)) == Decimal("1150.50")
+
+
+@pytest.mark.parametrize("nights", [0, 1, 2, 6, 7, 13, 60])
+@pytest.mark.parametrize("guests", [2, 4])
+def test_stay_price_matches_per_day_calculation(nights, guests):
+    accommodation = make_accommodation()
+    check_in = date(2026, 10, 14)
+    extra_beds = guests - accommodation.capacity
+
+    price_info = calculate_accommodation_price(accommodation, check_in, check_in + timedelta(days=nights), guests)
+
+    expected = [reference_price(accommodation, extra_beds, check_in + timedelta(days=i)) for i in range(nights)]
+    assert price_info["nights"] == nights
+    assert price_info["total"] == sum(expected, Decimal("0.00"))
+    assert [detail["price_on_day"] for detail in price_info["details"]] == expected
+    assert [detail["date"] for detail in price_info["details"]] == [
+        (check_in + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(nights)
+    ]
+
+
+def test_gazebo_priced_by_same_day():
+    accommodation = make_accommodation(type=AccommodationType.gazebo)
+    saturday = date(2026, 10, 17)
+
+    price_info = calculate_accommodation_price(accommodation, saturday, saturday, guests=10)
+
+    assert price_info["total"] == Decimal("1500.00")
+    assert price_info["nights"] == 0
+    assert price_info["details"] == [
+        {"date": "2026-10-17", "type": "weekend", "price_on_day": Decimal("1500.00"), "extra_beds": 0}
+    ]
+    friday_info = calculate_accommodation_price(accommodation, saturday - timedelta(days=1), saturday, guests=1)
+    assert friday_info["total"] == Decimal("1000.00")
+
+
+def test_missing_price_raises():
+    accommodation = make_accommodation()
+    accommodation.prices = accommodation.prices[:1]
+
+    with pytest.raises(ValueError):
+        calculate_accommodation_price(accommodation, date(2026, 10, 12), date(2026, 10, 20), 2)
@@ -0,0 +1,62 @@
+import logging
+import re
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from app.db.profiler import QueryProfilerMiddleware, install_query_profiler, statement_shape
+from app.db.session import test_async_engine
+
+
+@pytest.fixture(autouse=True)
+def profiled_test_engine():
+    install_query_profiler(test_async_engine)
+
+
+@pytest.mark.asyncio
+async def test_server_timing_header(async_client: AsyncClient, create_accommodation):
+    accommodation_id = await create_accommodation()
+    response = await async_client.get(f"/accommodations/{accommodation_id}")
+
+    match = re.fullmatch(r'db;dur=([\d.]+);desc="(\d+) queries"', response.headers["server-timing"])
+    assert match and int(match.group(2)) >= 1
+
+    # Ответ из кэша каталога не ходит в БД
+    response = await async_client.get(f"/accommodations/{accommodation_id}")
+    assert response.headers["server-timing"].endswith('desc="0 queries"')
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_reported_as_n_plus_one(db_session, caplog):
+    async def app(scope, receive, send):
+        for day in range(6):
+            await db_session.execute(text("SELECT :day"), {"day": day})
+        await db_session.execute(text("SELECT 1"))
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    async def receive():
+        return {"type": "http.request"}
+
+    with caplog.at_level(logging.WARNING, logger="app.db.profiler"):
+        await QueryProfilerMiddleware(app, debug=True, threshold=5)(
+            {"type": "http", "method": "GET", "path": "/test"}, receive, send
+        )
+
+    name, value = messages[0]["headers"][0]
+    assert name == b"server-timing" and value.endswith(b'desc="7 queries"')
+    assert [record.getMessage() for record in caplog.records] == [
+        "Возможный N+1 в GET /test: 6 раз выполнено SELECT ?"
+    ]
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT *\nFROM t WHERE id IN (?, ?)"
+    )
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+
+from app.db.session import test_async_engine
+from app.services.occupancy_matrix import OccupancyMatrix
+
+
+async def query_plans(run, table):
+    """Выполняет run() и возвращает EXPLAIN QUERY PLAN всех запросов к таблице table"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, *args):
+        if f"FROM {table}" in statement:
+            statements.append((statement, parameters))
+
+    event.listen(test_async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await run()
+    finally:
+        event.remove(test_async_engine.sync_engine, "before_cursor_execute", capture)
+
+    assert statements, f"Запросы к {table} не выполнялись"
+    plans = []
+    async with test_async_engine.connect() as conn:
+        for statement, parameters in statements:
+            result = await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+            plans.append("\n".join(row[-1] for row in result))
+    return plans
+
+
+def assert_no_full_scan(plans, table):
+    for plan in plans:
+        assert f"SCAN {table}" not in plan, plan
+
+
+@pytest.mark.asyncio
+async def test_bookings_on_date_uses_index(async_client: AsyncClient):
+    target_date = (date.today() + timedelta(days=3)).isoformat()
+
+    async def run():
+        response = await async_client.get("/bookings/", params={"target_date": target_date})
+        assert response.status_code == 200
+
+    plans = await query_plans(run, "bookings")
+    assert_no_full_scan(plans, "bookings")
+    assert "ix_bookings_check_out_check_in" in plans[0]
+
+
+@pytest.mark.asyncio
+async def test_find_availability_uses_index(async_client: AsyncClient, create_accommodation):
+    await create_accommodation(name="Дом")
+    await create_accommodation(name="Беседка", type="gazebo")
+    check_in = date.today() + timedelta(days=3)
+
+    async def run():
+        for check_out in (check_in, check_in + timedelta(days=5)):
+            response = await async_client.get("/accommodations/find", params={
+                "check_in_date": check_in.isoformat(),
+                "check_out_date": check_out.isoformat(),
+                "guests": 2,
+            })
+            assert response.status_code == 200
+
+    assert_no_full_scan(await query_plans(run, "accommodation_occupancy"), "accommodation_occupancy")
+
+
+@pytest.mark.asyncio
+async def test_occupancy_matrix_load_uses_index(db_session):
+    async def run():
+        await OccupancyMatrix(horizon_days=30).load(db_session)
+
+    assert_no_full_scan(await query_plans(run, "bookings"), "bookings")
@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.future import select
+
+from app.core.config import DatabaseSettings
+from app.db.base import Base
+from app.db.engine import create_async_engine_from_settings
+from app.db.session import get_async_db, get_async_read_db
+from app.main import app
+from app.models.accommodation import Accommodation, AccommodationPrice
+from tests.conftest import accommodation_payload
+
+
+@pytest.fixture
+async def primary_and_replica(tmp_path):
+    """Два файла SQLite вместо основной БД и реплики, реплика открыта только на чтение"""
+    engines = {}
+    for name, read_only in (("primary", False), ("replica", True)):
+        url = f"sqlite+aiosqlite:///{tmp_path / f'{name}.db'}"
+        engine = create_async_engine_from_settings(DatabaseSettings(url=url))
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Accommodation.__table__.insert(), {
+                "name": f"Дом ({name})", "type": "guest_house", "capacity": 4, "count": 1,
+            })
+            await conn.execute(AccommodationPrice.__table__.insert(), [
+                {"accommodation_id": 1, "weekday_type": weekday_type, "price": 1000, "extra_bed_price": 0}
+                for weekday_type in ("weekday", "weekend")
+            ])
+        await engine.dispose()
+        engines[name] = create_async_engine_from_settings(DatabaseSettings(url=url, read_only=read_only))
+
+    sessionmakers = {
+        name: async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+        for name, engine in engines.items()
+    }
+
+    def override(name):
+        async def get_session():
+            async with sessionmakers[name]() as db:
+                yield db
+        return get_session
+
+    app.dependency_overrides[get_async_db] = override("primary")
+    app.dependency_overrides[get_async_read_db] = override("replica")
+    yield sessionmakers
+    app.dependency_overrides.pop(get_async_db, None)
+    app.dependency_overrides.pop(get_async_read_db, None)
+    for engine in engines.values():
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(primary_and_replica):
+    check_in = date.today() + timedelta(days=10)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        response = await client.get("/accommodations/find", params={
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+            "guests": 2,
+        })
+        assert [item["accommodation"]["name"] for item in response.json()] == ["Дом (replica)"]
+
+        response = await client.post("/accommodations/", json=accommodation_payload(name="Новый дом"))
+        assert response.status_code == 200
+
+        # Каталог кэшируется и заполняется из основной БД: новое размещение видно сразу
+        response = await client.get("/accommodations/")
+        assert [accommodation["name"] for accommodation in response.json()] == ["Дом (primary)", "Новый дом"]
+
+    async with primary_and_replica["primary"]() as db:
+        names = (await db.execute(select(Accommodation.name).order_by(Accommodation.id))).scalars().all()
+    assert names == ["Дом (primary)", "Новый дом"]
+
+    async with primary_and_replica["replica"]() as db:
+        with pytest.raises(OperationalError):
+            await db.execute(text("DELETE FROM accommodations"))
+
+
+@pytest.mark.asyncio
+async def test_read_only_pool_on_same_sqlite_file(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'shared.db'}"
+    engine = create_async_engine_from_settings(DatabaseSettings(url=url))
+    read_engine = create_async_engine_from_settings(DatabaseSettings(url=url, read_only=True))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(Accommodation.__table__.insert(), {
+                "name": "Дом", "type": "guest_house", "capacity": 4, "count": 1,
+            })
+
+        async with read_engine.connect() as conn:
+            assert (await conn.execute(select(Accommodation.name))).scalars().all() == ["Дом"]
+            with pytest.raises(OperationalError):
+                await conn.execute(text("DELETE FROM accommodations"))
+    finally:
+        await read_engine.dispose()
+        await engine.dispose()
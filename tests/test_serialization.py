@@ -0,0 +1,153 @@
+import json
+from datetime import date, timedelta
+from decimal import Decimal
+import orjson
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from app.core.serialization import ORJSONResponse, compile_serializer, dumps
+from app.models.accommodation import Accommodation
+from app.models.booking import Booking
+from app.models.service import Service
+from app.schemas.accommodation import AccommodationSchema
+from app.schemas.booking import AvailableAccommodationSchema, BookingResponseSchema, FlexibleAvailabilitySchema
+from app.schemas.service import ServiceSchema
+from app.services.booking_service import calculate_accommodation_price, find_flexible, flexible_candidates
+
+
+def pydantic_json(schema, obj):
+    """Ответ, который раньше собирал FastAPI: валидация схемой, jsonable_encoder, json.dumps"""
+    return json.loads(json.dumps(jsonable_encoder(schema.parse_obj(obj) if isinstance(obj, dict) else schema.from_orm(obj))))
+
+
+def fast_json(schema, obj):
+    return orjson.loads(dumps(compile_serializer(schema)(obj)))
+
+
+async def _seed(async_client, create_accommodation):
+    house_id = await create_accommodation(
+        name="Дом", capacity=2, count=3, extra_beds_available=2, short_description="У озера",
+        prices=[
+            {"weekday_type": "weekday", "price": 1999.99, "extra_bed_price": 500.5},
+            {"weekday_type": "weekend", "price": 2500.0, "extra_bed_price": 0.0},
+        ],
+    )
+    gazebo_id = await create_accommodation(name="Беседка", type="gazebo", count=2, check_in_time="09:30")
+
+    check_in = date.today() + timedelta(days=20)
+    for accommodation_id, check_out, notes in (
+            (house_id, check_in + timedelta(days=3), "Поздний заезд"),
+            (gazebo_id, check_in, None),
+    ):
+        response = await async_client.get("/accommodations/find", params={
+            "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 3,
+        })
+        quote = next(item for item in response.json() if item["accommodation"]["id"] == accommodation_id)
+        response = await async_client.post("/bookings/", json={
+            "accommodation_id": accommodation_id,
+            "check_in_date": check_in.isoformat(),
+            "check_out_date": check_out.isoformat(),
+            "guests": 3,
+            "guest_name": "Иван",
+            "guest_phone": "+79990000000",
+            "guest_email": "ivan@example.com",
+            "notes": notes,
+            "total_price": quote["total_price"],
+            "quote_token": quote["quote_token"],
+        })
+        assert response.status_code == 201
+
+    response = await async_client.post("/services/", json={
+        "name": "Баня", "is_free": False, "is_agreement_required": True,
+        "prices": [{"weekday_type": "weekday", "duration_hours": 1.5, "price": 1000}, {"weekday_type": "weekend", "name": "Вечер", "price": 99.9}],
+    })
+    assert response.status_code == 200
+    return house_id, gazebo_id
+
+
+@pytest.mark.asyncio
+async def test_orm_serializers_match_pydantic(async_client, db_session, create_accommodation):
+    await _seed(async_client, create_accommodation)
+
+    result = await db_session.execute(select(Booking).options(selectinload(Booking.accommodation)))
+    bookings = result.scalars().all()
+    assert len(bookings) == 2
+    for booking in bookings:
+        assert fast_json(BookingResponseSchema, booking) == pydantic_json(BookingResponseSchema, booking)
+
+    result = await db_session.execute(select(Accommodation).options(selectinload(Accommodation.prices)))
+    for accommodation in result.scalars().all():
+        assert fast_json(AccommodationSchema, accommodation) == pydantic_json(AccommodationSchema, accommodation)
+
+    result = await db_session.execute(select(Service).options(selectinload(Service.prices)))
+    service = result.scalar_one()
+    assert fast_json(ServiceSchema, service) == pydantic_json(ServiceSchema, service)
+
+
+@pytest.mark.asyncio
+async def test_search_serializers_match_pydantic(async_client, db_session, create_accommodation):
+    house_id, _ = await _seed(async_client, create_accommodation)
+    house = await db_session.get(Accommodation, house_id)
+    check_in = date.today() + timedelta(days=40)
+
+    price = calculate_accommodation_price(house, check_in, check_in + timedelta(days=3), 4)
+    item = {
+        "accommodation": house,
+        "total_price": price["total"],
+        "nights": price["nights"],
+        "requires_extra_bed": True,
+        "prices": price["details"],
+        "quote_token": "token",
+    }
+    assert isinstance(item["total_price"], Decimal)
+    assert fast_json(AvailableAccommodationSchema, item) == pydantic_json(AvailableAccommodationSchema, item)
+
+    candidates = flexible_candidates(check_in, check_in + timedelta(days=14), 2, [4])
+    results = await find_flexible(db_session, [house], candidates, 2)
+    for result in results:
+        for option in result["options"]:
+            option["quote_token"] = "token"
+    assert results
+    for result in results:
+        assert fast_json(FlexibleAvailabilitySchema, result) == pydantic_json(FlexibleAvailabilitySchema, result)
+
+
+@pytest.mark.asyncio
+async def test_endpoints_return_same_json_as_schemas(async_client, db_session, create_accommodation):
+    house_id, _ = await _seed(async_client, create_accommodation)
+
+    response = await async_client.get("/bookings/", params={"limit": 1})
+    assert response.headers["content-type"] == "application/json"
+    assert "x-next-cursor" in response.headers
+    booking = await db_session.get(Booking, response.json()[0]["id"], options=[selectinload(Booking.accommodation)])
+    assert response.json() == [pydantic_json(BookingResponseSchema, booking)]
+
+    response = await async_client.get(f"/accommodations/{house_id}")
+    house = await db_session.get(Accommodation, house_id)
+    assert response.json() == pydantic_json(AccommodationSchema, house)
+
+    check_in = date.today() + timedelta(days=40)
+    check_out = check_in + timedelta(days=2)
+    response = await async_client.get("/accommodations/find", params={
+        "check_in_date": check_in.isoformat(), "check_out_date": check_out.isoformat(), "guests": 4,
+    })
+    found = {item["accommodation"]["id"]: item for item in response.json()}[house_id]
+    item = {**found, "accommodation": house, **calculate_accommodation_price(house, check_in, check_out, 4)}
+    item["total_price"], item["prices"] = item.pop("total"), item.pop("details")
+    assert found == pydantic_json(AvailableAccommodationSchema, item)
+
+
+def test_unsupported_schema_fails_at_compile_time():
+    class WithSet(BaseModel):
+        tags: set
+
+    with pytest.raises(TypeError):
+        compile_serializer(WithSet)
+
+
+def test_orjson_response_encodes_decimal_and_dates():
+    response = ORJSONResponse({"price": Decimal("10.50"), "day": date(2025, 6, 1), "name": "Дом"})
+    assert response.body == '{"price":10.5,"day":"2025-06-01","name":"Дом"}'.encode()
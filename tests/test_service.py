@@ -38,4 +38,20 @@ async def test_create_services(async_client: AsyncClient):
     assert response.status_code == 200
 
     data = response.json()
-    assert data["name"] == "Тестовый сервис"
\ No newline at end of file
+    assert data["name"] == "Тестовый сервис"
+
+@pytest.mark.asyncio
+async def test_create_service_invalidates_cache(async_client: AsyncClient):
+    response = await async_client.get("/services/")
+    assert response.json() == []
+
+    await async_client.post("/services/", json={
+        "name": "Баня",
+        "is_free": False,
+        "is_agreement_required": True,
+        "prices": [{"weekday_type": "weekday", "duration_hours": 2, "price": 3000}]
+    })
+
+    response = await async_client.get("/services/")
+    assert [item["name"] for item in response.json()] == ["Баня"]
+    assert response.json()[0]["prices"][0]["price"] == 3000.0
@@ -0,0 +1,74 @@
+"""add_accommodation_occupancy
+
+Revision ID: c40427cb4270
+Revises: 0037685bb9e6
+Create Date: 2026-10-18 10:15:12.604211
+
+"""
+from collections import Counter
+from datetime import timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c40427cb4270'
+down_revision: Union[str, None] = '0037685bb9e6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    occupancy = op.create_table(
+        'accommodation_occupancy',
+        sa.Column('accommodation_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('booked_units', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['accommodation_id'], ['accommodations.id']),
+        sa.PrimaryKeyConstraint('accommodation_id', 'date'),
+    )
+
+    # Заполняем учет занятости по уже существующим броням
+    bookings = sa.table(
+        'bookings',
+        sa.column('accommodation_id', sa.Integer),
+        sa.column('check_in_date', sa.Date),
+        sa.column('check_out_date', sa.Date),
+    )
+    accommodations = sa.table(
+        'accommodations',
+        sa.column('id', sa.Integer),
+        sa.column('type', sa.String),
+    )
+
+    rows = op.get_bind().execute(
+        sa.select(
+            bookings.c.accommodation_id,
+            bookings.c.check_in_date,
+            bookings.c.check_out_date,
+            accommodations.c.type,
+        ).join(accommodations, accommodations.c.id == bookings.c.accommodation_id)
+    )
+
+    booked_units = Counter()
+    for accommodation_id, check_in_date, check_out_date, accommodation_type in rows:
+        # Беседка занимает только день заезда, номера/дома - каждую ночь [заезд, выезд)
+        if accommodation_type == 'gazebo':
+            booked_units[(accommodation_id, check_in_date)] += 1
+            continue
+        for i in range((check_out_date - check_in_date).days):
+            booked_units[(accommodation_id, check_in_date + timedelta(days=i))] += 1
+
+    if booked_units:
+        op.bulk_insert(occupancy, [
+            {'accommodation_id': accommodation_id, 'date': day, 'booked_units': units}
+            for (accommodation_id, day), units in booked_units.items()
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('accommodation_occupancy')
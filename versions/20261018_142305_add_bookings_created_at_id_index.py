@@ -0,0 +1,28 @@
+"""add_bookings_created_at_id_index
+
+Revision ID: c0d23556ffca
+Revises: c40427cb4270
+Create Date: 2026-10-18 14:23:05.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c0d23556ffca'
+down_revision: Union[str, None] = 'c40427cb4270'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_bookings_created_at_id', 'bookings', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_created_at_id', table_name='bookings')
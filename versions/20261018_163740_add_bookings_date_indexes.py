@@ -0,0 +1,33 @@
+"""add_bookings_date_indexes
+
+Revision ID: d2923a368052
+Revises: c0d23556ffca
+Create Date: 2026-10-18 16:37:40.552906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2923a368052'
+down_revision: Union[str, None] = 'c0d23556ffca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_bookings_accommodation_dates', 'bookings',
+        ['accommodation_id', 'check_in_date', 'check_out_date'], unique=False
+    )
+    op.create_index('ix_bookings_check_out_check_in', 'bookings', ['check_out_date', 'check_in_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_bookings_check_out_check_in', table_name='bookings')
+    op.drop_index('ix_bookings_accommodation_dates', table_name='bookings')